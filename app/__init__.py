@@ -1,44 +1,34 @@
-from flask import Flask
-from typing import Optional
-import sqlite3
+from flask import Flask, current_app
+from typing import List, Optional
 import os
 from config import Config
+from app.migrations import Migration, migrate
+from app.utils import auth_utils, cache_utils, db_utils, metrics_utils, password_utils
 
 def create_app(config: Optional[Config] = None) -> Flask:
     app = Flask(__name__)
     if config is None:
         config = Config()
     app.config.from_object(config)
-    with app.app_context():
-        init_db()
-    from app.routes import auth, books, members
+    metrics_utils.init_app(app)
+    db_utils.init_app(app)
+    auth_utils.init_app(app)
+    password_utils.init_app(app)
+    cache_utils.init_app(app)
+    if app.config['AUTO_MIGRATE']:
+        with app.app_context():
+            init_db()
+    from app.routes import auth, batch, books, members, metrics
     app.register_blueprint(auth.bp)
+    app.register_blueprint(batch.bp)
     app.register_blueprint(books.bp)
     app.register_blueprint(members.bp)
+    app.register_blueprint(metrics.bp)
+    metrics_utils.instrument_views(app)
     return app
 
-def init_db() -> None:
-    os.makedirs(os.path.dirname(Config.DATABASE_PATH), exist_ok=True)
-    conn = sqlite3.connect(Config.DATABASE_PATH)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            author TEXT NOT NULL,
-            isbn TEXT UNIQUE NOT NULL,
-            quantity INTEGER NOT NULL
-        )
-    ''')
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS members (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-
+def init_db() -> List[Migration]:
+    database_path = current_app.config['DATABASE_PATH']
+    if os.path.dirname(database_path):
+        os.makedirs(os.path.dirname(database_path), exist_ok=True)
+    return migrate(db_utils.get_db())
@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+import sqlite3
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+PLAN_PROBES: Tuple[Tuple[str, str, Tuple[Any, ...]], ...] = (
+    ('books by author', 'SELECT id, title FROM books WHERE author = ?', ('Frank Herbert',)),
+    ('books sorted by title', 'SELECT id, title FROM books WHERE (title, id) > (?, ?) ORDER BY title, id LIMIT 20', ('', 0)),
+    ('books sorted by author', 'SELECT id, author FROM books WHERE (author, id) > (?, ?) ORDER BY author, id LIMIT 20', ('', 0)),
+    ('members sorted by name', 'SELECT id, name FROM members WHERE (name, id) > (?, ?) ORDER BY name, id LIMIT 20', ('', 0)),
+    ('member by email', 'SELECT * FROM members WHERE email = ?', ('someone@example.com',))
+)
+
+def _create_tables(c: sqlite3.Cursor) -> None:
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            isbn TEXT UNIQUE NOT NULL,
+            quantity INTEGER NOT NULL
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    ''')
+
+def _row_counts(c: sqlite3.Cursor) -> None:
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS row_counts (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL
+        )
+    ''')
+    for table in ('books', 'members'):
+        c.execute(
+            f"INSERT OR IGNORE INTO row_counts SELECT '{table}', COUNT(*) FROM {table}"
+        )
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE row_counts SET row_count = row_count + 1 WHERE table_name = '{table}';
+            END
+        ''')
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_delete AFTER DELETE ON {table}
+            BEGIN
+                UPDATE row_counts SET row_count = row_count - 1 WHERE table_name = '{table}';
+            END
+        ''')
+
+def _books_fts(c: sqlite3.Cursor) -> None:
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'books_fts'")
+    fts_exists = c.fetchone() is not None
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+            title,
+            author,
+            content='books',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    ''')
+    if not fts_exists:
+        c.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books
+        BEGIN
+            INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books
+        BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books
+        BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+            INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''')
+
+def _lookup_indexes(c: sqlite3.Cursor) -> None:
+    c.execute('CREATE INDEX IF NOT EXISTS idx_books_title ON books(title)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_books_author ON books(author)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_members_name ON members(name)')
+
+def _analyze(c: sqlite3.Cursor) -> None:
+    c.execute('ANALYZE')
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Create books and members tables", _create_tables),
+    Migration(2, "Maintain row counts with triggers", _row_counts),
+    Migration(3, "Full-text index on book titles and authors", _books_fts),
+    Migration(4, "Index books(title), books(author) and members(name)", _lookup_indexes),
+    Migration(5, "Collect planner statistics with ANALYZE", _analyze)
+]
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def pending_migrations(conn: sqlite3.Connection) -> List[Migration]:
+    version = schema_version(conn)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+def migrate(conn: sqlite3.Connection) -> List[Migration]:
+    version = schema_version(conn)
+    if version >= MIGRATIONS[-1].version:
+        return []
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        c = conn.cursor()
+        try:
+            c.execute('BEGIN IMMEDIATE')
+            if schema_version(conn) < migration.version:
+                migration.apply(c)
+                c.execute(f'PRAGMA user_version = {int(migration.version)}')
+                applied.append(migration)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
+
+def query_plans(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    plans = {}
+    for name, sql, params in PLAN_PROBES:
+        try:
+            rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+            plans[name] = [row[-1] for row in rows]
+        except sqlite3.Error as e:
+            plans[name] = [f"unavailable: {e}"]
+    return plans
+
+def dry_run(conn: sqlite3.Connection) -> Tuple[List[Migration], Dict[str, List[str]], Dict[str, List[str]]]:
+    pending = pending_migrations(conn)
+    before = query_plans(conn)
+    if not pending:
+        return pending, before, before
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        for migration in pending:
+            migration.apply(c)
+        after = query_plans(conn)
+    finally:
+        conn.rollback()
+    return pending, before, after
@@ -1,8 +1,10 @@
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import ClassVar, Optional, Dict, Any, Tuple
 
 @dataclass
 class Book:
+    FIELDS: ClassVar[Tuple[str, ...]] = ('id', 'title', 'author', 'isbn', 'quantity')
+
     id: Optional[int]
     title: str
     author: str
@@ -1,10 +1,12 @@
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
-import hashlib
+from typing import ClassVar, Optional, Dict, Any, Tuple
+from app.utils import password_utils
 import re
 
 @dataclass
 class Member:
+    PUBLIC_FIELDS: ClassVar[Tuple[str, ...]] = ('id', 'name', 'email')
+
     id: Optional[int]
     name: str
     email: str
@@ -19,7 +21,7 @@ class Member:
 
     @staticmethod
     def hash_password(password: str) -> str:
-        return hashlib.sha256(password.encode()).hexdigest()
+        return password_utils.hash_password(password)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Member':
@@ -27,11 +29,11 @@ class Member:
             id=data.get('id'),
             name=data['name'],
             email=data['email'],
-            password=cls.hash_password(data['password'])
+            password=data['password']
         )
 
     def check_password(self, password: str) -> bool:
-        return self.password == self.hash_password(password)
+        return password_utils.verify_password(password, self.password)
 
     def validate(self) -> Optional[str]:
         if not self.name or len(self.name.strip()) == 0:
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
 from app.models.member import Member
-from app.utils.auth_utils import create_token
+from app.utils.auth_utils import create_token, require_auth, revoke_token
+from app.utils.cache_utils import invalidate_cache
 from typing import Tuple, Dict, Any
 import sqlite3
-from config import Config
+from app.utils.db_utils import commit_db, get_db, get_pool
+from app.utils.password_utils import HasherBusy, get_hasher, needs_rehash
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -24,8 +26,10 @@ def register() -> Tuple[Dict[str, Any], int]:
         error = member.validate()
         if error:
             return jsonify({"error": error}), 400
-        
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+
+        hasher = get_hasher()
+        member.password = hasher.hash(member.password)
+        conn = get_db()
         c = conn.cursor()
         
         try:
@@ -34,13 +38,11 @@ def register() -> Tuple[Dict[str, Any], int]:
                 (member.name, member.email, member.password)
             )
             member.id = c.lastrowid
-            conn.commit()
+            commit_db()
+            invalidate_cache('members')
         except sqlite3.IntegrityError:
-            conn.close()
             return jsonify({"error": "Email already exists"}), 400
-        finally:
-            conn.close()
-        
+
         token = create_token(member.id)
         
         return jsonify({
@@ -49,6 +51,8 @@ def register() -> Tuple[Dict[str, Any], int]:
             "member": member.to_dict()
         }), 201
         
+    except HasherBusy as e:
+        return jsonify({"error": str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -59,12 +63,11 @@ def login() -> Tuple[Dict[str, Any], int]:
         if not data or 'email' not in data or 'password' not in data:
             return jsonify({"error": "Email and password required"}), 400
         
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        conn = get_db()
         c = conn.cursor()
         
         c.execute('SELECT * FROM members WHERE email = ?', (data['email'],))
         member_data = c.fetchone()
-        conn.close()
         
         if member_data is None:
             return jsonify({"error": "Invalid email or password"}), 401
@@ -76,8 +79,11 @@ def login() -> Tuple[Dict[str, Any], int]:
             password=member_data[3]
         )
         
-        if not member.check_password(data['password']):
+        hasher = get_hasher()
+        if not hasher.verify(data['password'], member.password):
             return jsonify({"error": "Invalid email or password"}), 401
+        if needs_rehash(member.password, hasher.n):
+            hasher.rehash_in_background(get_pool(), member.id, data['password'], member.password)
         
         token = create_token(member.id)
         
@@ -86,6 +92,16 @@ def login() -> Tuple[Dict[str, Any], int]:
             "member": member.to_dict()
         }), 200
         
+    except HasherBusy as e:
+        return jsonify({"error": str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@bp.route('/logout', methods=['POST'])
+@require_auth
+def logout() -> Tuple[Dict[str, Any], int]:
+    try:
+        revoke_token(request.headers['Authorization'].split(" ")[1])
+        return jsonify({"message": "Logged out"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,75 @@
+from flask import Blueprint, Response, current_app, g, request
+from werkzeug.exceptions import HTTPException
+from app.utils.auth_utils import require_auth
+from app.utils.cache_utils import invalidate_cache
+from app.utils.db_utils import get_db
+from typing import Tuple, Dict, Any
+import sqlite3
+
+bp = Blueprint('batch', __name__)
+
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+BATCH_EXCLUDED_ENDPOINTS = ('batch.run_batch', 'books.bulk_create_books', 'books.export_catalog')
+
+@bp.route('/batch', methods=['POST'])
+@require_auth
+def run_batch() -> Tuple[Dict[str, Any], int]:
+    try:
+        data = request.get_json(silent=True)
+        items = data.get('requests') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return {"error": "Expected a non-empty 'requests' list"}, 400
+        limit = current_app.config['BATCH_MAX_REQUESTS']
+        if len(items) > limit:
+            return {"error": f"Batch exceeds the limit of {limit} requests"}, 400
+        authorization = request.headers['Authorization']
+        conn = get_db()
+        g.batch_user_id = request.user_id
+        g.batch_invalidations = set()
+        try:
+            conn.execute('BEGIN')
+            responses = [_run_item(conn, item, authorization) for item in items]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            g.pop('batch_user_id', None)
+            namespaces = g.pop('batch_invalidations', set())
+        if namespaces:
+            invalidate_cache(*namespaces)
+        return {"responses": responses}, 200
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+def _run_item(conn: sqlite3.Connection, item: Any, authorization: str) -> Dict[str, Any]:
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        return {"status": 400, "body": {"error": "Each request needs a path"}}
+    method = str(item.get('method', 'GET')).upper()
+    if method not in BATCH_METHODS:
+        return {"status": 405, "body": {"error": f"Unsupported method: {method}"}}
+    conn.execute('SAVEPOINT batch_item')
+    try:
+        with current_app.test_request_context(
+            item['path'],
+            method=method,
+            json=item.get('body'),
+            headers={'Authorization': authorization}
+        ):
+            response = _dispatch()
+    except Exception as e:
+        response = current_app.make_response(({"error": str(e)}, 500))
+    if response.status_code >= 400:
+        conn.execute('ROLLBACK TO batch_item')
+    conn.execute('RELEASE batch_item')
+    body = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+    return {"status": response.status_code, "body": body}
+
+def _dispatch() -> Response:
+    try:
+        if request.url_rule is not None and request.url_rule.endpoint in BATCH_EXCLUDED_ENDPOINTS:
+            return current_app.make_response(({"error": "Endpoint not allowed in a batch"}, 400))
+        rv = current_app.dispatch_request()
+    except HTTPException as e:
+        rv = {"error": e.description}, e.code
+    return current_app.make_response(rv)
@@ -1,91 +1,173 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from app.models.book import Book
 from app.utils.auth_utils import require_auth
+from app.utils.cache_utils import cached_response, invalidate_cache
 from typing import Tuple, Dict, Any, List
 import sqlite3
-from config import Config
+from app.utils.db_utils import commit_db, get_db
+from app.utils.query_utils import (
+    get_page_size, wants_total, encode_cursor, keyset_clause, get_row_count,
+    build_fts_query, parse_fields, select_list, dict_row_factory, parse_ids, fetch_by_ids
+)
+from app.utils.import_utils import import_books, iter_ndjson, iter_json_array
+from app.utils.export_utils import EXPORT_FORMATS, export_books
 
 bp = Blueprint('books', __name__, url_prefix='/books')
 
+BOOK_SORT_KEYS = ('id', 'title', 'author')
+BOOK_SEARCH_FIELDS = ('title', 'author')
+
 @bp.route('', methods=['GET'])
 @require_auth
+@cached_response('books')
 def list_books() -> Tuple[Dict[str, Any], int]:
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', Config.PAGE_SIZE, type=int)
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        if 'ids' in request.args:
+            return get_books_by_ids()
+        if 'after' in request.args or 'limit' in request.args:
+            return list_books_after()
+        fields = parse_fields(Book.FIELDS)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = get_page_size('per_page')
+        conn = get_db()
         c = conn.cursor()
-        c.execute('SELECT COUNT(*) FROM books')
-        total = c.fetchone()[0]
+        c.row_factory = dict_row_factory
+        total = get_row_count(conn, 'books')
         offset = (page - 1) * per_page
-        c.execute('SELECT * FROM books LIMIT ? OFFSET ?', (per_page, offset))
-        books = []
-        for row in c.fetchall():
-            books.append(Book(
-                id=row[0],
-                title=row[1],
-                author=row[2],
-                isbn=row[3],
-                quantity=row[4]
-            ).to_dict())
-        conn.close()
+        c.execute(
+            f'SELECT {select_list(fields)} FROM books LIMIT ? OFFSET ?',
+            (per_page, offset)
+        )
         return {
-            "books": books,
+            "books": c.fetchall(),
             "total": total,
             "page": page,
             "per_page": per_page,
             "total_pages": (total + per_page - 1) // per_page
         }, 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
         return {"error": str(e)}, 500
 
+def get_books_by_ids() -> Tuple[Dict[str, Any], int]:
+    fields = parse_fields(Book.FIELDS)
+    rows, missing = fetch_by_ids(get_db(), 'books', fields, parse_ids())
+    return {
+        "books": rows,
+        "missing": missing
+    }, 200
+
+def list_books_after() -> Tuple[Dict[str, Any], int]:
+    sort = request.args.get('sort', 'id')
+    if sort not in BOOK_SORT_KEYS:
+        return {"error": f"Invalid sort key: {sort}"}, 400
+    fields = parse_fields(Book.FIELDS)
+    limit = get_page_size('limit')
+    where, params = keyset_clause(sort, request.args.get('after'))
+    order = 'id' if sort == 'id' else f'{sort}, id'
+    extra = tuple(key for key in dict.fromkeys(('id', sort)) if key not in fields)
+    conn = get_db()
+    c = conn.cursor()
+    c.row_factory = dict_row_factory
+    c.execute(
+        f'SELECT {select_list(fields + extra)} FROM books {where} ORDER BY {order} LIMIT ?',
+        params + (limit + 1,)
+    )
+    rows = c.fetchall()
+    books = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = books[-1]
+        next_cursor = encode_cursor(sort, last[sort], last['id'])
+    for book in books:
+        for key in extra:
+            del book[key]
+    result = {
+        "books": books,
+        "limit": limit,
+        "next_cursor": next_cursor
+    }
+    if wants_total():
+        result["total"] = get_row_count(conn, 'books')
+    return result, 200
+
 @bp.route('/search', methods=['GET'])
 @require_auth
+@cached_response('books')
 def search_books() -> Tuple[Dict[str, Any], int]:
     try:
         query = request.args.get('q', '')
         if not query:
             return {"error": "Search query required"}, 400
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        match = build_fts_query(query, BOOK_SEARCH_FIELDS)
+        fields = parse_fields(Book.FIELDS)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = get_page_size('per_page')
+        conn = get_db()
         c = conn.cursor()
-        search_pattern = f"%{query}%"
+        c.row_factory = dict_row_factory
         c.execute(
-            'SELECT * FROM books WHERE title LIKE ? OR author LIKE ?',
-            (search_pattern, search_pattern)
+            f'''SELECT {select_list(fields, 'books')} FROM books_fts
+               JOIN books ON books.id = books_fts.rowid
+               WHERE books_fts MATCH ?
+               ORDER BY books_fts.rank
+               LIMIT ? OFFSET ?''',
+            (match, per_page + 1, (page - 1) * per_page)
         )
-        books = []
-        for row in c.fetchall():
-            books.append(Book(
-                id=row[0],
-                title=row[1],
-                author=row[2],
-                isbn=row[3],
-                quantity=row[4]
-            ).to_dict())
-        conn.close()
-        return {"books": books}, 200
+        rows = c.fetchall()
+        return {
+            "books": rows[:per_page],
+            "page": page,
+            "per_page": per_page,
+            "has_more": len(rows) > per_page
+        }, 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
         return {"error": str(e)}, 500
 
+@bp.route('/export', methods=['GET'])
+@require_auth
+def export_catalog() -> Any:
+    format = request.args.get('format', 'ndjson')
+    if format not in EXPORT_FORMATS:
+        return {"error": f"Unsupported export format: {format}"}, 400
+    try:
+        fields = parse_fields(Book.FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    compress = (
+        request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+        or 'gzip' in request.accept_encodings
+    )
+    headers = {'Content-Disposition': f'attachment; filename=books.{format}'}
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    headers['Vary'] = 'Accept-Encoding'
+    chunks = export_books(get_db(), format, compress=compress, columns=fields)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[format],
+        headers=headers
+    )
+
 @bp.route('/<int:id>', methods=['GET'])
 @require_auth
+@cached_response('books')
 def get_book(id: int) -> Tuple[Dict[str, Any], int]:
     try:
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        fields = parse_fields(Book.FIELDS)
+        conn = get_db()
         c = conn.cursor()
-        c.execute('SELECT * FROM books WHERE id = ?', (id,))
+        c.row_factory = dict_row_factory
+        c.execute(f'SELECT {select_list(fields)} FROM books WHERE id = ?', (id,))
         row = c.fetchone()
-        conn.close()
         if row is None:
             return {"error": "Book not found"}, 404
-        book = Book(
-            id=row[0],
-            title=row[1],
-            author=row[2],
-            isbn=row[3],
-            quantity=row[4]
-        )
-        return book.to_dict(), 200
+        return row, 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
         return {"error": str(e)}, 500
 
@@ -100,15 +182,15 @@ def create_book() -> Tuple[Dict[str, Any], int]:
         error = book.validate()
         if error:
             return {"error": error}, 400
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        conn = get_db()
         c = conn.cursor()
         c.execute(
             'INSERT INTO books (title, author, isbn, quantity) VALUES (?, ?, ?, ?)',
             (book.title, book.author, book.isbn, book.quantity)
         )
         book.id = c.lastrowid
-        conn.commit()
-        conn.close()
+        commit_db()
+        invalidate_cache('books')
         return book.to_dict(), 201
     except sqlite3.IntegrityError:
         return {"error": "ISBN already exists"}, 400
@@ -117,6 +199,28 @@ def create_book() -> Tuple[Dict[str, Any], int]:
     except Exception as e:
         return {"error": str(e)}, 500
 
+@bp.route('/bulk', methods=['POST'])
+@require_auth
+def bulk_create_books() -> Tuple[Dict[str, Any], int]:
+    try:
+        if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+            records = iter_ndjson(request.stream)
+        else:
+            data = request.get_json(silent=True)
+            if not isinstance(data, list):
+                return {"error": "Expected a JSON array or NDJSON body"}, 400
+            records = iter_json_array(data)
+        report = import_books(
+            get_db(),
+            records,
+            batch_size=current_app.config['IMPORT_BATCH_SIZE']
+        )
+        if report.inserted:
+            invalidate_cache('books')
+        return report.to_dict(), 200
+    except Exception as e:
+        return {"error": str(e)}, 500
+
 @bp.route('/<int:id>', methods=['PUT'])
 @require_auth
 def update_book(id: int) -> Tuple[Dict[str, Any], int]:
@@ -129,17 +233,16 @@ def update_book(id: int) -> Tuple[Dict[str, Any], int]:
         error = book.validate()
         if error:
             return {"error": error}, 400
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        conn = get_db()
         c = conn.cursor()
         c.execute(
             'UPDATE books SET title = ?, author = ?, isbn = ?, quantity = ? WHERE id = ?',
             (book.title, book.author, book.isbn, book.quantity, id)
         )
         if c.rowcount == 0:
-            conn.close()
             return {"error": "Book not found"}, 404
-        conn.commit()
-        conn.close()
+        commit_db()
+        invalidate_cache('books')
         return book.to_dict(), 200
     except sqlite3.IntegrityError:
         return {"error": "ISBN already exists"}, 400
@@ -152,14 +255,13 @@ def update_book(id: int) -> Tuple[Dict[str, Any], int]:
 @require_auth
 def delete_book(id: int) -> Tuple[Dict[str, Any], int]:
     try:
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        conn = get_db()
         c = conn.cursor()
         c.execute('DELETE FROM books WHERE id = ?', (id,))
         if c.rowcount == 0:
-            conn.close()
             return {"error": "Book not found"}, 404
-        conn.commit()
-        conn.close()
+        commit_db()
+        invalidate_cache('books')
         return {"message": "Book deleted successfully"}, 200
     except Exception as e:
         return {"error": str(e)}, 500
@@ -1,58 +1,107 @@
 from flask import Blueprint, request, jsonify
 from app.models.member import Member
-from app.utils.auth_utils import require_auth
+from app.utils.auth_utils import require_auth, revoke_user
+from app.utils.cache_utils import cached_response, invalidate_cache
 from typing import Tuple, Dict, Any, List
 import sqlite3
-from config import Config
+from app.utils.db_utils import commit_db, get_db
+from app.utils.password_utils import HasherBusy, get_hasher
+from app.utils.query_utils import (
+    get_page_size, wants_total, encode_cursor, keyset_clause, get_row_count,
+    parse_fields, select_list, dict_row_factory, parse_ids, fetch_by_ids
+)
 
 bp = Blueprint('members', __name__, url_prefix='/members')
 
+MEMBER_SORT_KEYS = ('id', 'name')
+
 @bp.route('', methods=['GET'])
 @require_auth
+@cached_response('members')
 def list_members() -> Tuple[Dict[str, Any], int]:
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', Config.PAGE_SIZE, type=int)
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        if 'ids' in request.args:
+            return get_members_by_ids()
+        if 'after' in request.args or 'limit' in request.args:
+            return list_members_after()
+        fields = parse_fields(Member.PUBLIC_FIELDS)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = get_page_size('per_page')
+        conn = get_db()
         c = conn.cursor()
-        c.execute('SELECT COUNT(*) FROM members')
-        total = c.fetchone()[0]
+        c.row_factory = dict_row_factory
+        total = get_row_count(conn, 'members')
         offset = (page - 1) * per_page
-        c.execute('SELECT id, name, email FROM members LIMIT ? OFFSET ?', 
+        c.execute(f'SELECT {select_list(fields)} FROM members LIMIT ? OFFSET ?', 
                  (per_page, offset))
-        members = []
-        for row in c.fetchall():
-            members.append({
-                "id": row[0],
-                "name": row[1],
-                "email": row[2]
-            })
-        conn.close()
         return {
-            "members": members,
+            "members": c.fetchall(),
             "total": total,
             "page": page,
             "per_page": per_page,
             "total_pages": (total + per_page - 1) // per_page
         }, 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
         return {"error": str(e)}, 500
+
+def get_members_by_ids() -> Tuple[Dict[str, Any], int]:
+    fields = parse_fields(Member.PUBLIC_FIELDS)
+    rows, missing = fetch_by_ids(get_db(), 'members', fields, parse_ids())
+    return {
+        "members": rows,
+        "missing": missing
+    }, 200
+def list_members_after() -> Tuple[Dict[str, Any], int]:
+    sort = request.args.get('sort', 'id')
+    if sort not in MEMBER_SORT_KEYS:
+        return {"error": f"Invalid sort key: {sort}"}, 400
+    fields = parse_fields(Member.PUBLIC_FIELDS)
+    limit = get_page_size('limit')
+    where, params = keyset_clause(sort, request.args.get('after'))
+    order = 'id' if sort == 'id' else f'{sort}, id'
+    extra = tuple(key for key in dict.fromkeys(('id', sort)) if key not in fields)
+    conn = get_db()
+    c = conn.cursor()
+    c.row_factory = dict_row_factory
+    c.execute(
+        f'SELECT {select_list(fields + extra)} FROM members {where} ORDER BY {order} LIMIT ?',
+        params + (limit + 1,)
+    )
+    rows = c.fetchall()
+    members = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = members[-1]
+        next_cursor = encode_cursor(sort, last[sort], last['id'])
+    for member in members:
+        for key in extra:
+            del member[key]
+    result = {
+        "members": members,
+        "limit": limit,
+        "next_cursor": next_cursor
+    }
+    if wants_total():
+        result["total"] = get_row_count(conn, 'members')
+    return result, 200
 @bp.route('/<int:id>', methods=['GET'])
 @require_auth
+@cached_response('members')
 def get_member(id: int) -> Tuple[Dict[str, Any], int]:
     try:
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        fields = parse_fields(Member.PUBLIC_FIELDS)
+        conn = get_db()
         c = conn.cursor()
-        c.execute('SELECT id, name, email FROM members WHERE id = ?', (id,))
+        c.row_factory = dict_row_factory
+        c.execute(f'SELECT {select_list(fields)} FROM members WHERE id = ?', (id,))
         row = c.fetchone()
-        conn.close()
         if row is None:
             return {"error": "Member not found"}, 404
-        return {
-            "id": row[0],
-            "name": row[1],
-            "email": row[2]
-        }, 200
+        return row, 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
         return {"error": str(e)}, 500
 @bp.route('/<int:id>', methods=['PUT'])
@@ -71,40 +120,43 @@ def update_member(id: int) -> Tuple[Dict[str, Any], int]:
             values.append(data['name'])
         if 'password' in data:
             updates.append('password = ?')
-            values.append(Member.hash_password(data['password']))
+            if len(data['password']) < 8:
+                return {"error": "Password must be at least 8 characters long"}, 400
+            values.append(get_hasher().hash(data['password']))
         if not updates:
             return {"error": "No valid fields to update"}, 400
         values.append(id)
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        conn = get_db()
         c = conn.cursor()
         query = f"UPDATE members SET {', '.join(updates)} WHERE id = ?"
         c.execute(query, values)
         if c.rowcount == 0:
-            conn.close()
             return {"error": "Member not found"}, 404
-        conn.commit()
+        commit_db()
+        invalidate_cache('members')
         c.execute('SELECT id, name, email FROM members WHERE id = ?', (id,))
         row = c.fetchone()
-        conn.close()
         return {
             "id": row[0],
             "name": row[1],
             "email": row[2]
         }, 200
+    except HasherBusy as e:
+        return {"error": str(e)}, 503, {'Retry-After': '1'}
     except Exception as e:
         return {"error": str(e)}, 500
 @bp.route('/<int:id>', methods=['DELETE'])
 @require_auth
 def delete_member(id: int) -> Tuple[Dict[str, Any], int]:
     try:
-        conn = sqlite3.connect(Config.DATABASE_PATH)
+        conn = get_db()
         c = conn.cursor()
         c.execute('DELETE FROM members WHERE id = ?', (id,))
         if c.rowcount == 0:
-            conn.close()
             return {"error": "Member not found"}, 404
-        conn.commit()
-        conn.close()
+        commit_db()
+        invalidate_cache('members')
+        revoke_user(id)
         return {"message": "Member deleted successfully"}, 200
     except Exception as e:
         return {"error": str(e)}, 500
@@ -0,0 +1,49 @@
+from flask import Blueprint, Response, current_app
+from typing import Any, Dict, List, Tuple
+from app.utils.metrics_utils import get_metrics
+
+bp = Blueprint('metrics', __name__)
+
+def _component_metrics() -> List[Tuple[str, str, Dict[str, str], float]]:
+    extra: List[Tuple[str, str, Dict[str, str], float]] = []
+    pool = current_app.extensions.get('db_pool')
+    if pool is not None:
+        stats = pool.stats()
+        for key in ('size', 'open', 'idle'):
+            extra.append(('gauge', f'library_db_pool_{key}', {}, stats[key]))
+        for key in ('hits', 'misses', 'waits', 'timeouts'):
+            extra.append(('counter', f'library_db_pool_{key}_total', {}, stats[key]))
+        extra.append(('counter', 'library_db_pool_wait_seconds_total', {}, stats['wait_time']))
+    authority = current_app.extensions.get('token_authority')
+    if authority is not None:
+        stats = authority.cache.stats()
+        extra.append(('gauge', 'library_token_cache_size', {}, stats['size']))
+        extra.append(('counter', 'library_token_cache_hits_total', {}, stats['hits']))
+        extra.append(('counter', 'library_token_cache_misses_total', {}, stats['misses']))
+        extra.append(('gauge', 'library_token_cache_hit_ratio', {}, stats['hit_rate']))
+        for key, value in authority.revoked.stats().items():
+            extra.append(('gauge', 'library_token_revocations', {'kind': key}, value))
+    cache = current_app.extensions.get('response_cache')
+    if cache is not None:
+        stats = cache.stats()
+        extra.append(('gauge', 'library_response_cache_entries', {}, stats['entries']))
+        extra.append(('gauge', 'library_response_cache_bytes', {}, stats['bytes']))
+        for key in ('hits', 'misses', 'not_modified', 'evictions', 'invalidations'):
+            extra.append(('counter', f'library_response_cache_{key}_total', {}, stats[key]))
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is not None:
+        stats = hasher.stats()
+        extra.append(('gauge', 'library_password_hash_in_flight', {}, stats['in_flight']))
+        for key in ('completed', 'rejected', 'rehashed'):
+            extra.append(('counter', f'library_password_hash_{key}_total', {}, stats[key]))
+    return extra
+
+@bp.route('/metrics', methods=['GET'])
+def metrics() -> Any:
+    registry = get_metrics()
+    if registry is None:
+        return {"error": "Metrics are disabled"}, 404
+    return Response(
+        registry.render(_component_metrics()),
+        mimetype='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,323 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote_to_bytes
+import asyncio
+import contextvars
+import io
+import socket
+import sys
+import threading
+
+STATUS_LINE_END = b'\r\n'
+HEADER_END = b'\r\n\r\n'
+
+class BadRequest(Exception):
+    pass
+
+class AsyncWSGIServer:
+    def __init__(
+        self,
+        app: Callable,
+        host: str = '127.0.0.1',
+        port: int = 5001,
+        workers: int = 16,
+        max_pending: Optional[int] = None,
+        keepalive_timeout: float = 75.0,
+        max_body_size: int = 64 * 1024 * 1024,
+        max_header_size: int = 64 * 1024,
+        max_requests: int = 0,
+        sock: Optional[socket.socket] = None
+    ) -> None:
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_pending = max_pending or workers * 4
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body_size = max_body_size
+        self.max_header_size = max_header_size
+        self.max_requests = max_requests
+        self.sock = sock
+        self.on_max_requests: Optional[Callable[[], None]] = None
+        self.draining = False
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wsgi')
+        self.open_connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._busy: Dict[asyncio.StreamWriter, bool] = {}
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Semaphore(self.max_pending)
+        if self.sock is not None:
+            self._server = await asyncio.start_server(
+                self._handle_connection,
+                sock=self.sock,
+                limit=self.max_header_size
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection,
+                self.host,
+                self.port,
+                limit=self.max_header_size,
+                backlog=2048
+            )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def drain(self, timeout: float = 30.0) -> None:
+        self.draining = True
+        if self._server is not None:
+            self._server.close()
+        for writer, busy in list(self._busy.items()):
+            if not busy:
+                writer.close()
+        deadline = asyncio.get_running_loop().time() + timeout
+        while self._busy and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+        self.executor.shutdown(wait=False)
+
+    def stop(self) -> None:
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        self.executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self.draining:
+            writer.close()
+            return
+        self.open_connections += 1
+        self._busy[writer] = False
+        peer = writer.get_extra_info('peername') or ('', 0)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(HEADER_END), self.keepalive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write_error(writer, 431, 'Request Header Fields Too Large')
+                    break
+                self._busy[writer] = True
+                try:
+                    method, target, version, headers = parse_head(head)
+                    body = await self._read_body(reader, headers)
+                except BadRequest as e:
+                    await self._write_error(writer, 400, str(e))
+                    break
+                keep_alive = wants_keep_alive(version, headers) and not self.draining
+                environ = build_environ(method, target, version, headers, body, peer, self.host, self.port)
+                self.requests += 1
+                if self.max_requests and self.requests == self.max_requests and self.on_max_requests:
+                    self.on_max_requests()
+                async with self._pending:
+                    keep_alive = await self._respond(environ, writer, version, keep_alive)
+                self._busy[writer] = False
+                if not keep_alive or self.draining:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.open_connections -= 1
+            self._busy.pop(writer, None)
+            writer.close()
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size_line = await reader.readuntil(STATUS_LINE_END)
+                try:
+                    size = int(size_line.split(b';', 1)[0].strip(), 16)
+                except ValueError:
+                    raise BadRequest("Invalid chunk size")
+                if size == 0:
+                    while (await reader.readuntil(STATUS_LINE_END)) != STATUS_LINE_END:
+                        pass
+                    return bytes(body)
+                if len(body) + size > self.max_body_size:
+                    raise BadRequest("Request body too large")
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+        length = headers.get('content-length')
+        if not length:
+            return b''
+        try:
+            size = int(length)
+        except ValueError:
+            raise BadRequest("Invalid Content-Length")
+        if size < 0 or size > self.max_body_size:
+            raise BadRequest("Request body too large")
+        return await reader.readexactly(size)
+
+    async def _respond(
+        self,
+        environ: Dict[str, Any],
+        writer: asyncio.StreamWriter,
+        version: str,
+        keep_alive: bool
+    ) -> bool:
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        status, response_headers, iterator, close = await loop.run_in_executor(
+            self.executor, context.run, call_app, self.app, environ
+        )
+        try:
+            names = {name.lower() for name, _ in response_headers}
+            chunked = 'content-length' not in names and version == 'HTTP/1.1'
+            if 'content-length' not in names and not chunked:
+                keep_alive = False
+            head = [f'{version} {status}\r\n']
+            head.extend(f'{name}: {value}\r\n' for name, value in response_headers)
+            if chunked:
+                head.append('Transfer-Encoding: chunked\r\n')
+            head.append('Connection: keep-alive\r\n' if keep_alive else 'Connection: close\r\n')
+            head.append('\r\n')
+            writer.write(''.join(head).encode('latin-1'))
+            if environ['REQUEST_METHOD'] != 'HEAD':
+                while True:
+                    chunk = await loop.run_in_executor(self.executor, context.run, next, iterator, None)
+                    if chunk is None:
+                        break
+                    if not chunk:
+                        continue
+                    writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+                    await writer.drain()
+                if chunked:
+                    writer.write(b'0\r\n\r\n')
+            await writer.drain()
+        finally:
+            if close is not None:
+                await loop.run_in_executor(self.executor, context.run, close)
+        return keep_alive
+
+    async def _write_error(self, writer: asyncio.StreamWriter, status: int, reason: str) -> None:
+        body = reason.encode()
+        writer.write(
+            f'HTTP/1.1 {status} {reason}\r\nContent-Type: text/plain\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + body
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+def call_app(app: Callable, environ: Dict[str, Any]) -> Tuple[str, List[Tuple[str, str]], Any, Optional[Callable]]:
+    response: Dict[str, Any] = {}
+
+    def start_response(status: str, headers: List[Tuple[str, str]], exc_info: Any = None) -> Callable:
+        response['status'] = status
+        response['headers'] = headers
+        return lambda data: None
+
+    result: Iterable[bytes] = app(environ, start_response)
+    iterator = iter(result)
+    first = next(iterator, None)
+    chunks = iter(([first] if first is not None else []))
+    return (
+        response['status'],
+        response['headers'],
+        _chain(chunks, iterator),
+        getattr(result, 'close', None)
+    )
+
+def _chain(first: Any, rest: Any) -> Any:
+    yield from first
+    yield from rest
+
+def parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    try:
+        lines = head.decode('latin-1').split('\r\n')
+        method, target, version = lines[0].split(' ', 2)
+    except ValueError:
+        raise BadRequest("Malformed request line")
+    if version not in ('HTTP/1.0', 'HTTP/1.1'):
+        raise BadRequest("Unsupported HTTP version")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(':')
+        if not sep:
+            raise BadRequest("Malformed header")
+        name = name.strip().lower()
+        value = value.strip()
+        headers[name] = f'{headers[name]}, {value}' if name in headers else value
+    return method, target, version, headers
+
+def wants_keep_alive(version: str, headers: Dict[str, str]) -> bool:
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.1':
+        return 'close' not in connection
+    return 'keep-alive' in connection
+
+def build_environ(
+    method: str,
+    target: str,
+    version: str,
+    headers: Dict[str, str],
+    body: bytes,
+    peer: Tuple[Any, ...],
+    host: str,
+    port: int
+) -> Dict[str, Any]:
+    path, _, query = target.partition('?')
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': unquote_to_bytes(path).decode('latin-1'),
+        'QUERY_STRING': query,
+        'SERVER_NAME': host,
+        'SERVER_PORT': str(port),
+        'SERVER_PROTOCOL': version,
+        'REMOTE_ADDR': str(peer[0]),
+        'REMOTE_PORT': str(peer[1]) if len(peer) > 1 else '',
+        'CONTENT_LENGTH': str(len(body)) if body else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    for name, value in headers.items():
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name not in ('content-length', 'transfer-encoding'):
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+def serve(app: Callable, host: str, port: int, workers: int) -> None:
+    server = AsyncWSGIServer(app, host, port, workers=workers)
+    print(f"Serving on http://{host}:{port} with asyncio and {workers} worker threads")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+def start_in_thread(server: AsyncWSGIServer) -> threading.Thread:
+    started = threading.Event()
+
+    def run() -> None:
+        async def main() -> None:
+            await server.start()
+            started.set()
+            await server.serve_forever()
+        try:
+            asyncio.run(main())
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait()
+    return thread
@@ -0,0 +1,197 @@
+from typing import Callable, Dict, List, Optional
+from flask import Flask
+from app.server.async_server import AsyncWSGIServer
+import asyncio
+import os
+import random
+import signal
+import socket
+import sys
+import time
+
+def prepare_fork(app: Flask) -> None:
+    pool = app.extensions.get('db_pool')
+    if pool is not None:
+        pool.close_idle()
+    cache = app.extensions.get('response_cache')
+    if cache is not None:
+        cache.close()
+
+def after_fork(app: Flask) -> None:
+    for extension in app.extensions.values():
+        reset = getattr(extension, 'after_fork', None)
+        if reset is not None:
+            reset()
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+def run_worker(
+    app: Flask,
+    sock: socket.socket,
+    host: str,
+    threads: int,
+    max_requests: int,
+    graceful_timeout: float
+) -> None:
+    after_fork(app)
+    server = AsyncWSGIServer(app, host, workers=threads, max_requests=max_requests, sock=sock)
+
+    async def main() -> None:
+        loop = asyncio.get_running_loop()
+        stopping = asyncio.Event()
+        server.on_max_requests = stopping.set
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stopping.set)
+        await server.start()
+        await stopping.wait()
+        await server.drain(graceful_timeout)
+
+    asyncio.run(main())
+
+class PreforkServer:
+    def __init__(
+        self,
+        app_factory: Callable[[], Flask],
+        host: str = '0.0.0.0',
+        port: int = 5001,
+        workers: int = 4,
+        threads: int = 8,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout: float = 30.0,
+        app: Optional[Flask] = None
+    ) -> None:
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.threads = threads
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.app = app
+        self.sock: Optional[socket.socket] = None
+        self.children: Dict[int, int] = {}
+        self.generation = 0
+        self._reload = False
+        self._stopping = False
+
+    def spawn(self) -> int:
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid:
+            self.children[pid] = self.generation
+            return pid
+        code = 0
+        try:
+            for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            run_worker(self.app, self.sock, self.host, self.threads, max_requests, self.graceful_timeout)
+        except Exception as e:
+            print(f"worker {os.getpid()} crashed: {e}", file=sys.stderr)
+            code = 1
+        finally:
+            os._exit(code)
+
+    def load(self) -> None:
+        self.app = self.app_factory()
+        prepare_fork(self.app)
+
+    def reload(self) -> None:
+        self._reload = False
+        old = [pid for pid, generation in self.children.items() if generation == self.generation]
+        try:
+            self.load()
+        except Exception as e:
+            print(f"reload failed, keeping current workers: {e}", file=sys.stderr)
+            return
+        self.generation += 1
+        for _ in range(self.workers):
+            self.spawn()
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+        print(f"Reloaded: generation {self.generation}, retiring {len(old)} workers", flush=True)
+
+    def reap(self) -> List[int]:
+        exited = []
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            generation = self.children.pop(pid, None)
+            if generation == self.generation:
+                exited.append(pid)
+        return exited
+
+    def _signal(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            self.children.pop(pid, None)
+
+    def _request_reload(self, signum: int, frame: object) -> None:
+        self._reload = True
+
+    def _request_stop(self, signum: int, frame: object) -> None:
+        self._stopping = True
+
+    def run(self) -> None:
+        if self.app is None:
+            self.load()
+        else:
+            prepare_fork(self.app)
+        self.sock = bind_socket(self.host, self.port)
+        signal.signal(signal.SIGHUP, self._request_reload)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for _ in range(self.workers):
+            self.spawn()
+        print(
+            f"Serving on http://{self.host}:{self.port} with {self.workers} workers "
+            f"x {self.threads} threads (pid {os.getpid()})",
+            flush=True
+        )
+        try:
+            while not self._stopping:
+                if self._reload:
+                    self.reload()
+                for _ in self.reap():
+                    if not self._stopping:
+                        self.spawn()
+                time.sleep(0.1)
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            for pid in list(self.children):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    self.children.pop(pid, None)
+            time.sleep(0.05)
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.children.clear()
+        if self.sock is not None:
+            self.sock.close()
@@ -1,54 +1,176 @@
+from collections import OrderedDict
 from functools import wraps
-from typing import Callable, Any, Dict
-from flask import request, current_app
+from typing import Callable, Any, Dict, Optional, Set, Tuple
+from flask import Flask, g, request, current_app
+from app.utils.metrics_utils import record_auth_time
 import base64
 import json
 import hmac
 import hashlib
+import threading
 import time
 
+class TokenCache:
+    def __init__(self, max_size: int = 10000) -> None:
+        self.max_size = max_size
+        self._entries: 'OrderedDict[str, Tuple[str, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, signature: str, payload_b64: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None or not hmac.compare_digest(entry[0], payload_b64):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, signature: str, payload_b64: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[signature] = (payload_b64, payload)
+            self._entries.move_to_end(signature)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, signature: str) -> None:
+        with self._lock:
+            self._entries.pop(signature, None)
+
+    def after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+class RevocationList:
+    def __init__(self) -> None:
+        self._tokens: Dict[str, int] = {}
+        self._users: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def revoke_token(self, signature: str, exp: int) -> None:
+        now = int(time.time())
+        with self._lock:
+            self._tokens[signature] = exp
+            if len(self._tokens) % 1024 == 0:
+                self._tokens = {s: e for s, e in self._tokens.items() if e >= now}
+
+    def revoke_user(self, user_id: int) -> None:
+        with self._lock:
+            self._users.add(user_id)
+
+    def is_revoked(self, signature: str, user_id: int) -> bool:
+        return signature in self._tokens or user_id in self._users
+
+    def after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"tokens": len(self._tokens), "users": len(self._users)}
+
+class TokenAuthority:
+    def __init__(self, secret_key: str, expiration: int, cache_size: int) -> None:
+        self._signer = hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+        self.expiration = expiration
+        self.cache = TokenCache(cache_size)
+        self.revoked = RevocationList()
+
+    def sign(self, payload_b64: str) -> str:
+        signer = self._signer.copy()
+        signer.update(payload_b64.encode())
+        return signer.hexdigest()
+
+    def after_fork(self) -> None:
+        self.cache.after_fork()
+        self.revoked.after_fork()
+
+def init_app(app: Flask) -> None:
+    app.extensions['token_authority'] = TokenAuthority(
+        app.config['SECRET_KEY'],
+        app.config['TOKEN_EXPIRATION'],
+        app.config['TOKEN_CACHE_SIZE']
+    )
+
+def get_authority() -> TokenAuthority:
+    return current_app.extensions['token_authority']
+
 def create_token(user_id: int) -> str:
+    authority = get_authority()
     payload = {
         'user_id': user_id,
-        'exp': int(time.time()) + current_app.config['TOKEN_EXPIRATION']
+        'exp': int(time.time()) + authority.expiration
     }
     payload_b64 = base64.b64encode(json.dumps(payload).encode()).decode()
-    signature = hmac.new(
-        current_app.config['SECRET_KEY'].encode(),
-        payload_b64.encode(),
-        hashlib.sha256
-    ).hexdigest()
+    signature = authority.sign(payload_b64)
     return f"{payload_b64}.{signature}"
 
-def verify_token(token: str) -> Dict[str, Any]:
+def _split_token(token: str) -> Tuple[str, str]:
     try:
         payload_b64, signature = token.split('.')
-        expected_signature = hmac.new(
-            current_app.config['SECRET_KEY'].encode(),
-            payload_b64.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        if not hmac.compare_digest(signature, expected_signature):
-            raise ValueError("Invalid token")
-        payload = json.loads(base64.b64decode(payload_b64))
-        if payload['exp'] < int(time.time()):
-            raise ValueError("Token has expired")
-        return payload
-    except Exception:
+    except ValueError:
         raise ValueError("Invalid token format")
+    return payload_b64, signature
+
+def verify_token(token: str) -> Dict[str, Any]:
+    authority = get_authority()
+    payload_b64, signature = _split_token(token)
+    payload = authority.cache.get(signature, payload_b64)
+    if payload is None:
+        if not hmac.compare_digest(signature, authority.sign(payload_b64)):
+            raise ValueError("Invalid token")
+        try:
+            payload = json.loads(base64.b64decode(payload_b64))
+            int(payload['exp'])
+            int(payload['user_id'])
+        except Exception:
+            raise ValueError("Invalid token format")
+        authority.cache.put(signature, payload_b64, payload)
+    if payload['exp'] < int(time.time()):
+        authority.cache.discard(signature)
+        raise ValueError("Token has expired")
+    if authority.revoked.is_revoked(signature, payload['user_id']):
+        raise ValueError("Token has been revoked")
+    return payload
+
+def revoke_token(token: str) -> None:
+    payload = verify_token(token)
+    signature = _split_token(token)[1]
+    authority = get_authority()
+    authority.revoked.revoke_token(signature, payload['exp'])
+    authority.cache.discard(signature)
+
+def revoke_user(user_id: int) -> None:
+    get_authority().revoked.revoke_user(user_id)
 
 def require_auth(f: Callable) -> Callable:
     @wraps(f)
     def decorated_function(*args: Any, **kwargs: Any) -> Any:
+        if 'batch_user_id' in g:
+            request.user_id = g.batch_user_id
+            return f(*args, **kwargs)
         auth_header = request.headers.get('Authorization')
         if not auth_header:
             return {"error": "No authorization header"}, 401
+        start = time.perf_counter()
         try:
             token = auth_header.split(" ")[1]
             payload = verify_token(token)
             request.user_id = payload['user_id']
         except (IndexError, ValueError) as e:
             return {"error": str(e)}, 401
+        finally:
+            record_auth_time(time.perf_counter() - start)
         return f(*args, **kwargs)
     return decorated_function
-
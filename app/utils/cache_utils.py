@@ -0,0 +1,181 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from flask import Flask, Response, current_app, g, request
+import hashlib
+import sqlite3
+import threading
+
+@dataclass
+class CacheEntry:
+    namespace: str
+    body: bytes
+    etag: str
+    mimetype: str
+
+class ResponseCache:
+    def __init__(self, max_bytes: int, database_path: Optional[str] = None) -> None:
+        self.max_bytes = max_bytes
+        self.database_path = database_path
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._keys: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._watch: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def generation(self, namespace: str) -> Tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._generations.get(namespace, 0)
+
+    def put(self, key: str, entry: CacheEntry, generation: Tuple[int, int]) -> None:
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            if (self._epoch, self._generations.get(entry.namespace, 0)) != generation:
+                return
+            self._remove(key)
+            self._entries[key] = entry
+            self._keys.setdefault(entry.namespace, set()).add(key)
+            self.size += len(entry.body)
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+            self._keys[entry.namespace].discard(key)
+
+    def invalidate(self, *namespaces: str) -> None:
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+                for key in list(self._keys.get(namespace, ())):
+                    self._remove(key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._keys.clear()
+            self.size = 0
+            self.invalidations += 1
+
+    def sync_data_version(self) -> None:
+        if self.database_path is None:
+            return
+        with self._lock:
+            if self._watch is None:
+                self._watch = sqlite3.connect(self.database_path, check_same_thread=False)
+            version = self._watch.execute('PRAGMA data_version').fetchone()[0]
+            changed = self._data_version is not None and version != self._data_version
+            self._data_version = version
+        if changed:
+            self.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._watch is not None:
+                self._watch.close()
+                self._watch = None
+            self._data_version = None
+
+    def after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._watch = None
+        self._data_version = None
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+def init_app(app: Flask) -> None:
+    cache = None
+    if app.config['RESPONSE_CACHE_SIZE'] > 0:
+        cache = ResponseCache(
+            app.config['RESPONSE_CACHE_SIZE'],
+            app.config['DATABASE_PATH'] if app.config['RESPONSE_CACHE_WATCH_DATA_VERSION'] else None
+        )
+    app.extensions['response_cache'] = cache
+
+def get_cache() -> Optional[ResponseCache]:
+    return current_app.extensions.get('response_cache')
+
+def invalidate_cache(*namespaces: str) -> None:
+    if 'batch_invalidations' in g:
+        g.batch_invalidations.update(namespaces)
+        return
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidate(*namespaces)
+
+def _respond(cache: ResponseCache, entry: CacheEntry) -> Response:
+    if request.if_none_match.contains(entry.etag):
+        cache.record_not_modified()
+        response = Response(status=304)
+    else:
+        response = Response(entry.body, status=200, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    return response
+
+def cached_response(namespace: str) -> Callable:
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def decorated_function(*args: Any, **kwargs: Any) -> Any:
+            cache = get_cache()
+            if cache is None or request.method != 'GET' or 'batch_user_id' in g:
+                return f(*args, **kwargs)
+            cache.sync_data_version()
+            key = request.full_path
+            entry = cache.get(key)
+            if entry is None:
+                generation = cache.generation(namespace)
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                entry = CacheEntry(
+                    namespace=namespace,
+                    body=body,
+                    etag=hashlib.sha1(body).hexdigest(),
+                    mimetype=response.mimetype
+                )
+                cache.put(key, entry, generation)
+            return _respond(cache, entry)
+        return decorated_function
+    return decorator
@@ -0,0 +1,182 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from flask import Flask, current_app, g
+from app.utils.metrics_utils import MetricsRegistry, TimedConnection
+import queue
+import sqlite3
+import threading
+import time
+
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    def __init__(
+        self,
+        database_path: str,
+        size: int = 8,
+        timeout: float = 5.0,
+        busy_timeout: int = 5000,
+        mmap_size: int = 268435456,
+        cache_size: int = -16000,
+        statement_cache: int = 256,
+        metrics: Optional[MetricsRegistry] = None
+    ) -> None:
+        self.database_path = database_path
+        self.size = size
+        self.timeout = timeout
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.statement_cache = statement_cache
+        self.metrics = metrics
+        self._idle: 'queue.LifoQueue[sqlite3.Connection]' = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database_path,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False,
+            cached_statements=self.statement_cache,
+            factory=TimedConnection
+        )
+        conn.metrics = self.metrics
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute(f'PRAGMA cache_size={int(self.cache_size)}')
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self.hits += 1
+            return conn
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+                self.misses += 1
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout("Timed out waiting for a database connection")
+        with self._lock:
+            self.hits += 1
+            self.waits += 1
+            self.wait_time += time.perf_counter() - start
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        if self._closed:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        self._closed = True
+        self.close_idle()
+
+    def close_idle(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def after_fork(self) -> None:
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self.hits = self.misses = self.waits = self.timeouts = 0
+        self.wait_time = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": self._idle.qsize(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+                "timeouts": self.timeouts
+            }
+
+def init_app(app: Flask) -> None:
+    app.extensions['db_pool'] = ConnectionPool(
+        app.config['DATABASE_PATH'],
+        size=app.config['DB_POOL_SIZE'],
+        timeout=app.config['DB_POOL_TIMEOUT'],
+        busy_timeout=app.config['DB_BUSY_TIMEOUT'],
+        mmap_size=app.config['DB_MMAP_SIZE'],
+        cache_size=app.config['DB_CACHE_SIZE'],
+        statement_cache=app.config['DB_STATEMENT_CACHE'],
+        metrics=app.extensions.get('metrics')
+    )
+    app.teardown_appcontext(close_db)
+
+def get_pool(app: Optional[Flask] = None) -> ConnectionPool:
+    return (app or current_app).extensions['db_pool']
+
+def get_db() -> sqlite3.Connection:
+    if 'db' not in g:
+        g.db = get_pool().acquire()
+    return g.db
+
+def close_db(e: Optional[BaseException] = None) -> None:
+    conn = g.pop('db', None)
+    if conn is not None:
+        get_pool().release(conn)
+
+def commit_db() -> None:
+    if 'batch_user_id' in g:
+        return
+    get_db().commit()
@@ -0,0 +1,79 @@
+from typing import Any, Iterable, Iterator, Sequence, Tuple
+import csv
+import io
+import json
+import sqlite3
+import zlib
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+BOOK_EXPORT_COLUMNS = ('id', 'title', 'author', 'isbn', 'quantity')
+
+def iter_rows(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: Sequence[Any] = (),
+    fetch_size: int = 1000
+) -> Iterator[Tuple[Any, ...]]:
+    c = conn.cursor()
+    c.execute(sql, params)
+    try:
+        while True:
+            rows = c.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        c.close()
+
+def iter_ndjson(columns: Sequence[str], rows: Iterable[Tuple[Any, ...]]) -> Iterator[bytes]:
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), separators=(',', ':')).encode() + b'\n'
+
+def iter_csv(columns: Sequence[str], rows: Iterable[Tuple[Any, ...]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def coalesce(pieces: Iterable[bytes], chunk_size: int = 65536) -> Iterator[bytes]:
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_books(
+    conn: sqlite3.Connection,
+    format: str,
+    compress: bool = False,
+    columns: Sequence[str] = BOOK_EXPORT_COLUMNS
+) -> Iterator[bytes]:
+    unknown = [column for column in columns if column not in BOOK_EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    rows = iter_rows(conn, f"SELECT {', '.join(columns)} FROM books ORDER BY id")
+    encode = iter_csv if format == 'csv' else iter_ndjson
+    chunks = coalesce(encode(columns, rows))
+    if compress:
+        chunks = gzip_chunks(chunks)
+    return chunks
@@ -0,0 +1,158 @@
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from app.models.book import Book
+import csv
+import json
+import sqlite3
+import time
+
+Record = Union[Dict[str, Any], 'RowError']
+
+class RowError(Exception):
+    pass
+
+@dataclass
+class ImportReport:
+    max_errors: int = 1000
+    inserted: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add_error(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": error})
+
+    @property
+    def rows_per_second(self) -> float:
+        total = self.inserted + self.failed
+        return total / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1)
+        }
+
+def iter_ndjson(lines: Iterable[Union[str, bytes]]) -> Iterator[Record]:
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield RowError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield RowError("Each line must be a JSON object")
+            continue
+        yield record
+
+def iter_csv(stream: IO[str]) -> Iterator[Record]:
+    for record in csv.DictReader(stream):
+        yield record
+
+def iter_json_array(data: Any) -> Iterator[Record]:
+    for record in data:
+        if not isinstance(record, dict):
+            yield RowError("Each item must be a JSON object")
+            continue
+        yield record
+
+def open_import_file(path: str, format: str) -> Tuple[IO[str], Iterator[Record]]:
+    stream = open(path, 'r', encoding='utf-8', newline='')
+    if format == 'csv':
+        return stream, iter_csv(stream)
+    return stream, iter_ndjson(stream)
+
+def _parse(row: int, record: Record, report: ImportReport) -> Optional[Book]:
+    if isinstance(record, RowError):
+        report.add_error(row, str(record))
+        return None
+    try:
+        book = Book.from_dict(record)
+        error = book.validate()
+    except KeyError as e:
+        error = f"Missing required field: {str(e)}"
+    except (TypeError, ValueError, AttributeError) as e:
+        error = f"Invalid value: {str(e)}"
+    if error:
+        report.add_error(row, error)
+        return None
+    return book
+
+def _existing_isbns(conn: sqlite3.Connection, isbns: List[str]) -> Set[str]:
+    existing = set()
+    for start in range(0, len(isbns), 500):
+        chunk = isbns[start:start + 500]
+        placeholders = ', '.join('?' * len(chunk))
+        for row in conn.execute(
+            f'SELECT isbn FROM books WHERE isbn IN ({placeholders})', chunk
+        ):
+            existing.add(row[0])
+    return existing
+
+def _insert_batch(
+    conn: sqlite3.Connection,
+    batch: List[Tuple[int, Book]],
+    report: ImportReport
+) -> None:
+    existing = _existing_isbns(conn, [book.isbn for _, book in batch])
+    seen = set()
+    rows = []
+    for row, book in batch:
+        if book.isbn in existing or book.isbn in seen:
+            report.add_error(row, "ISBN already exists")
+            continue
+        seen.add(book.isbn)
+        rows.append((row, book))
+    sql = 'INSERT INTO books (title, author, isbn, quantity) VALUES (?, ?, ?, ?)'
+    try:
+        conn.executemany(
+            sql,
+            [(book.title, book.author, book.isbn, book.quantity) for _, book in rows]
+        )
+        conn.commit()
+        report.inserted += len(rows)
+        return
+    except sqlite3.IntegrityError:
+        conn.rollback()
+    for row, book in rows:
+        try:
+            conn.execute(sql, (book.title, book.author, book.isbn, book.quantity))
+            report.inserted += 1
+        except sqlite3.IntegrityError:
+            report.add_error(row, "ISBN already exists")
+    conn.commit()
+
+def import_books(
+    conn: sqlite3.Connection,
+    records: Iterable[Record],
+    batch_size: int = 5000,
+    max_errors: int = 1000
+) -> ImportReport:
+    report = ImportReport(max_errors=max_errors)
+    start = time.perf_counter()
+    numbered = enumerate(records, start=1)
+    while True:
+        chunk = list(islice(numbered, batch_size))
+        if not chunk:
+            break
+        batch = []
+        for row, record in chunk:
+            book = _parse(row, record, report)
+            if book is not None:
+                batch.append((row, book))
+        if batch:
+            _insert_batch(conn, batch, report)
+    report.elapsed = time.perf_counter() - start
+    return report
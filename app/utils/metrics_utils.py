@@ -0,0 +1,280 @@
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+from flask import Flask, Response, current_app, g, has_request_context, request
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger('app.slow_query')
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+PLACEHOLDER_LIST = re.compile(r'\?(\s*,\s*\?)+')
+WHITESPACE = re.compile(r'\s+')
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+class MetricsRegistry:
+    def __init__(self, slow_query_threshold: float = 0.1, slow_query_log_size: int = 100) -> None:
+        self.slow_query_threshold = slow_query_threshold
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self.slow_queries: Deque[Dict[str, Any]] = deque(maxlen=slow_query_log_size)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record_slow_query(self, sql: str, elapsed: float, plan: List[str]) -> None:
+        entry = {"sql": sql, "elapsed_ms": round(elapsed * 1000, 3), "plan": plan, "at": time.time()}
+        with self._lock:
+            self.slow_queries.append(entry)
+        self.increment('library_slow_queries_total')
+        logger.warning("slow query (%.1f ms): %s | plan: %s", elapsed * 1000, sql, '; '.join(plan))
+
+    def after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def render(self, extra: Iterable[Tuple[str, str, Dict[str, str], float]] = ()) -> str:
+        lines: List[str] = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        seen = set()
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                lines.append(f'# TYPE {name} histogram')
+                seen.add(name)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels + (("le", _number(bound)),))} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {histogram.count}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(histogram.sum)}')
+            lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.append(f'# TYPE {name} counter')
+                seen.add(name)
+            lines.append(f'{name}{_labels(labels)} {_number(value)}')
+        for kind, name, labels, value in extra:
+            if name not in seen:
+                lines.append(f'# TYPE {name} {kind}')
+                seen.add(name)
+            lines.append(f'{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(str(value))}"' for key, value in labels) + '}'
+
+def normalize_sql(sql: str) -> str:
+    sql = WHITESPACE.sub(' ', sql).strip()
+    return PLACEHOLDER_LIST.sub('?, ...', sql)[:200]
+
+class TimedCursor(sqlite3.Cursor):
+    metrics: Optional[MetricsRegistry] = None
+    _pending: Optional[List[Any]] = None
+
+    def _start(self, sql: str, params: Any) -> None:
+        self._finish()
+        self._pending = [sql, params, 0.0]
+
+    def _add(self, elapsed: float) -> None:
+        if self._pending is not None:
+            self._pending[2] += elapsed
+        if has_request_context() and 'sql_time' in g:
+            g.sql_time += elapsed
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is None or self.metrics is None:
+            return
+        sql, params, elapsed = pending
+        statement = normalize_sql(sql)
+        self.metrics.observe('library_sql_duration_seconds', elapsed, statement=statement)
+        threshold = self.metrics.slow_query_threshold
+        if threshold > 0 and elapsed >= threshold and params is not None:
+            try:
+                plan = sqlite3.Cursor(self.connection).execute(
+                    f'EXPLAIN QUERY PLAN {sql}', params
+                ).fetchall()
+                detail = [row[-1] for row in plan]
+            except sqlite3.Error as e:
+                detail = [f"unavailable: {e}"]
+            self.metrics.record_slow_query(statement, elapsed, detail)
+
+    def execute(self, sql: str, parameters: Any = ()) -> 'TimedCursor':
+        self._start(sql, parameters)
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._add(time.perf_counter() - start)
+            if self.description is None:
+                self._finish()
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> 'TimedCursor':
+        self._start(sql, None)
+        start = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            self._add(time.perf_counter() - start)
+            self._finish()
+        return self
+
+    def fetchone(self) -> Any:
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add(time.perf_counter() - start)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._add(time.perf_counter() - start)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add(time.perf_counter() - start)
+        self._finish()
+        return rows
+
+    def __next__(self) -> Any:
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._add(time.perf_counter() - start)
+            self._finish()
+            raise
+        self._add(time.perf_counter() - start)
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+class TimedConnection(sqlite3.Connection):
+    metrics: Optional[MetricsRegistry] = None
+
+    def cursor(self, factory: Callable[..., sqlite3.Cursor] = TimedCursor) -> sqlite3.Cursor:
+        cursor = super().cursor(factory)
+        if isinstance(cursor, TimedCursor):
+            cursor.metrics = self.metrics
+        return cursor
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+class TimingMiddleware:
+    def __init__(self, wsgi_app: Callable) -> None:
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Any:
+        environ['library.request_start'] = time.perf_counter()
+        return self.wsgi_app(environ, start_response)
+
+def init_app(app: Flask) -> None:
+    metrics = MetricsRegistry(app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000)
+    app.extensions['metrics'] = metrics
+    app.wsgi_app = TimingMiddleware(app.wsgi_app)
+
+    @app.before_request
+    def start_request_timer() -> None:
+        now = time.perf_counter()
+        g.request_start = request.environ.get('library.request_start', now)
+        g.sql_time = 0.0
+        g.auth_time = 0.0
+        metrics.observe('library_request_phase_seconds', now - g.request_start, phase='routing')
+
+    @app.after_request
+    def record_request(response: Response) -> Response:
+        if 'request_start' not in g:
+            return response
+        now = time.perf_counter()
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe(
+            'library_request_duration_seconds',
+            now - g.request_start,
+            endpoint=endpoint,
+            method=request.method,
+            status=str(response.status_code)
+        )
+        metrics.observe('library_request_phase_seconds', g.auth_time, phase='auth')
+        metrics.observe('library_request_phase_seconds', g.sql_time, phase='sql')
+        if 'view_end' in g:
+            metrics.observe('library_request_phase_seconds', now - g.view_end, phase='serialize')
+        return response
+
+def instrument_views(app: Flask) -> None:
+    for endpoint, view in list(app.view_functions.items()):
+        app.view_functions[endpoint] = _timed_view(view)
+
+def _timed_view(view: Callable) -> Callable:
+    def timed_view(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return view(*args, **kwargs)
+        finally:
+            g.view_end = time.perf_counter()
+    timed_view.__name__ = view.__name__
+    timed_view.__wrapped__ = view
+    return timed_view
+
+def get_metrics(app: Optional[Flask] = None) -> Optional[MetricsRegistry]:
+    return (app or current_app).extensions.get('metrics')
+
+def record_auth_time(elapsed: float) -> None:
+    if 'auth_time' in g:
+        g.auth_time += elapsed
@@ -0,0 +1,170 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from flask import Flask, current_app
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+
+SCRYPT_PREFIX = 'scrypt'
+LEGACY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+class HasherBusy(Exception):
+    pass
+
+def hash_password(password: str, n: int = 16384, r: int = 8, p: int = 1) -> str:
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 1024 * 1024)
+    return '$'.join((
+        SCRYPT_PREFIX, str(n), str(r), str(p),
+        base64.b64encode(salt).decode(), base64.b64encode(digest).decode()
+    ))
+
+def verify_password(password: str, stored: str) -> bool:
+    if is_legacy(stored):
+        return hmac.compare_digest(stored, hashlib.sha256(password.encode()).hexdigest())
+    try:
+        scheme, n, r, p, salt, digest = stored.split('$')
+        if scheme != SCRYPT_PREFIX:
+            return False
+        expected = base64.b64decode(digest)
+        actual = hashlib.scrypt(
+            password.encode(),
+            salt=base64.b64decode(salt),
+            n=int(n),
+            r=int(r),
+            p=int(p),
+            maxmem=256 * int(n) * int(r) + 1024 * 1024,
+            dklen=len(expected)
+        )
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(actual, expected)
+
+def is_legacy(stored: str) -> bool:
+    return bool(LEGACY_PATTERN.match(stored))
+
+def needs_rehash(stored: str, n: int) -> bool:
+    if is_legacy(stored):
+        return True
+    parts = stored.split('$')
+    return len(parts) != 6 or parts[0] != SCRYPT_PREFIX or int(parts[1]) != n
+
+class PasswordHasher:
+    def __init__(self, workers: int = 2, max_pending: int = 32, n: int = 16384, timeout: float = 30.0) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.n = n
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> 'Future[Any]':
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy("Password hashing is overloaded, try again shortly")
+        with self._lock:
+            self.in_flight += 1
+        if self.workers <= 0:
+            future: 'Future[Any]' = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except Exception:
+                self._done(None)
+                raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Optional['Future[Any]']) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._submit(hash_password, password, self.n).result(self.timeout)
+
+    def verify(self, password: str, stored: str) -> bool:
+        if is_legacy(stored):
+            return verify_password(password, stored)
+        return self._submit(verify_password, password, stored).result(self.timeout)
+
+    def rehash_in_background(self, pool: Any, member_id: int, password: str, old_hash: str) -> None:
+        try:
+            future = self._submit(hash_password, password, self.n)
+        except HasherBusy:
+            return
+
+        def store(done: 'Future[str]') -> None:
+            if done.exception() is not None:
+                return
+            try:
+                with pool.connection() as conn:
+                    c = conn.execute(
+                        'UPDATE members SET password = ? WHERE id = ? AND password = ?',
+                        (done.result(), member_id, old_hash)
+                    )
+                    conn.commit()
+                if c.rowcount:
+                    with self._lock:
+                        self.rehashed += 1
+            except sqlite3.Error:
+                pass
+        future.add_done_callback(store)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def after_fork(self) -> None:
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+        self.in_flight = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed
+            }
+
+def init_app(app: Flask) -> None:
+    app.extensions['password_hasher'] = PasswordHasher(
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_QUEUE'],
+        n=app.config['PASSWORD_SCRYPT_N']
+    )
+
+def get_hasher() -> PasswordHasher:
+    return current_app.extensions['password_hasher']
@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Optional, Tuple
+from flask import request, current_app
+import base64
+import binascii
+import json
+import re
+import sqlite3
+
+def get_page_size(name: str) -> int:
+    size = request.args.get(name, current_app.config['PAGE_SIZE'], type=int)
+    if size < 1:
+        raise ValueError(f"{name} must be a positive integer")
+    return min(size, current_app.config['MAX_PAGE_SIZE'])
+
+def wants_total() -> bool:
+    return request.args.get('count', '').lower() in ('1', 'true', 'yes')
+
+def parse_fields(allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+    raw = request.args.get('fields')
+    if raw is None:
+        return allowed
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    if not fields:
+        raise ValueError("fields must name at least one field")
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def select_list(fields: Tuple[str, ...], table: Optional[str] = None) -> str:
+    if table:
+        return ', '.join(f'{table}.{field}' for field in fields)
+    return ', '.join(fields)
+
+def dict_row_factory(cursor: sqlite3.Cursor, row: Tuple[Any, ...]) -> Dict[str, Any]:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+def encode_cursor(sort: str, value: Any, id: int) -> str:
+    raw = json.dumps([sort, value, id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(id, int):
+        raise ValueError("Cursor does not match the requested sort")
+    return value, id
+
+def keyset_clause(sort: str, after: Optional[str]) -> Tuple[str, Tuple[Any, ...]]:
+    if not after:
+        return '', ()
+    value, id = decode_cursor(after, sort)
+    if sort == 'id':
+        return 'WHERE id > ?', (id,)
+    return f'WHERE ({sort}, id) > (?, ?)', (value, id)
+
+def get_row_count(conn: sqlite3.Connection, table: str) -> int:
+    row = conn.execute(
+        'SELECT row_count FROM row_counts WHERE table_name = ?', (table,)
+    ).fetchone()
+    return row[0] if row else 0
+
+def parse_ids(name: str = 'ids') -> Tuple[int, ...]:
+    try:
+        ids = tuple(dict.fromkeys(
+            int(part) for part in request.args.get(name, '').split(',') if part.strip()
+        ))
+    except ValueError:
+        raise ValueError(f"{name} must be a comma-separated list of integers")
+    if not ids:
+        raise ValueError(f"{name} must name at least one id")
+    limit = current_app.config['MAX_PAGE_SIZE']
+    if len(ids) > limit:
+        raise ValueError(f"{name} accepts at most {limit} ids")
+    return ids
+
+def fetch_by_ids(
+    conn: sqlite3.Connection,
+    table: str,
+    fields: Tuple[str, ...],
+    ids: Tuple[int, ...]
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    extra = () if 'id' in fields else ('id',)
+    c = conn.cursor()
+    c.row_factory = dict_row_factory
+    c.execute(
+        f"SELECT {select_list(fields + extra)} FROM {table} WHERE id IN ({', '.join('?' * len(ids))})",
+        ids
+    )
+    found = {row['id']: row for row in c.fetchall()}
+    for row in found.values():
+        for key in extra:
+            del row[key]
+    return [found[id] for id in ids if id in found], [id for id in ids if id not in found]
+
+FTS_TERM_PATTERN = re.compile(r'(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+
+def build_fts_query(query: str, columns: Tuple[str, ...]) -> str:
+    terms = []
+    for match in FTS_TERM_PATTERN.finditer(query):
+        column, phrase, word = match.groups()
+        if column is not None and column not in columns:
+            raise ValueError(f"Unknown search field: {column}")
+        text = phrase if phrase is not None else word
+        prefix = phrase is None and text.endswith('*')
+        text = text.rstrip('*').replace('"', '""').strip()
+        if not text:
+            continue
+        term = f'"{text}"' + ('*' if prefix else '')
+        terms.append(f'{column} : {term}' if column else term)
+    if not terms:
+        raise ValueError("Search query required")
+    return ' AND '.join(terms)
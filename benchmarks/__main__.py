@@ -0,0 +1,49 @@
+from benchmarks.runner import compare, run
+import argparse
+import json
+import os
+import sys
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the API benchmark suite")
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--members', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mode', choices=['client', 'wsgi', 'async'], default='client')
+    parser.add_argument('--url', help="Benchmark an already running server instead")
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenario', action='append', dest='scenarios')
+    parser.add_argument('--idle-connections', type=int, default=0, help="Hold this many idle keep-alive clients open")
+    parser.add_argument('--cache', action='store_true', help="Keep the response cache enabled")
+    parser.add_argument('--save', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="Compare against a saved JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.15)
+    args = parser.parse_args()
+
+    results = run(
+        args.books, args.members, args.seed, args.mode, args.requests,
+        args.concurrency, args.scenarios, args.cache, args.url, args.idle_connections
+    )
+    if args.save:
+        directory = os.path.dirname(args.save)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for key in ('books', 'members', 'mode', 'concurrency', 'cache', 'idle_connections'):
+            if baseline['meta'].get(key) != results['meta'][key]:
+                print(f"warning: baseline {key}={baseline['meta'].get(key)} differs from {results['meta'][key]}")
+        regressions = compare(baseline, results, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
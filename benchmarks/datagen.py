@@ -0,0 +1,61 @@
+from typing import Tuple
+from app.models.member import Member
+import random
+import sqlite3
+
+BENCH_PASSWORD = 'benchmark-password'
+
+ADJECTIVES = (
+    'Silent', 'Hidden', 'Broken', 'Golden', 'Distant', 'Crimson', 'Quiet', 'Endless',
+    'Forgotten', 'Burning', 'Frozen', 'Last', 'Lost', 'Secret', 'Wild', 'Ancient'
+)
+NOUNS = (
+    'River', 'Empire', 'Garden', 'Machine', 'Kingdom', 'Ocean', 'Library', 'Mountain',
+    'Storm', 'Shadow', 'Harbor', 'Forest', 'Algorithm', 'Python', 'Compiler', 'Voyage'
+)
+FIRST_NAMES = (
+    'Ada', 'Alan', 'Grace', 'Linus', 'Barbara', 'Donald', 'Edsger', 'Frances',
+    'Guido', 'Hedy', 'Ken', 'Margaret', 'Niklaus', 'Radia', 'Tim', 'Yukihiro'
+)
+LAST_NAMES = (
+    'Lovelace', 'Turing', 'Hopper', 'Torvalds', 'Liskov', 'Knuth', 'Dijkstra', 'Allen',
+    'Rossum', 'Lamarr', 'Thompson', 'Hamilton', 'Wirth', 'Perlman', 'Berners-Lee', 'Matsumoto'
+)
+
+def book_row(rng: random.Random, i: int) -> Tuple[str, str, str, int]:
+    title = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.choice(NOUNS)} {i}"
+    author = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return title, author, f"978{i:010d}", rng.randint(0, 20)
+
+def member_email(i: int) -> str:
+    return f"member{i}@example.com"
+
+def populate(
+    database_path: str,
+    books: int,
+    members: int,
+    seed: int = 42,
+    batch_size: int = 10000
+) -> None:
+    conn = sqlite3.connect(database_path)
+    conn.execute('PRAGMA synchronous=OFF')
+    rng = random.Random(seed)
+    for start in range(1, books + 1, batch_size):
+        conn.executemany(
+            'INSERT INTO books (title, author, isbn, quantity) VALUES (?, ?, ?, ?)',
+            [book_row(rng, i) for i in range(start, min(start + batch_size, books + 1))]
+        )
+        conn.commit()
+    password = Member.hash_password(BENCH_PASSWORD)
+    for start in range(1, members + 1, batch_size):
+        conn.executemany(
+            'INSERT INTO members (name, email, password) VALUES (?, ?, ?)',
+            [
+                (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", member_email(i), password)
+                for i in range(start, min(start + batch_size, members + 1))
+            ]
+        )
+        conn.commit()
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
@@ -0,0 +1,272 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+from flask import Flask
+from werkzeug.serving import WSGIRequestHandler, make_server
+from app import create_app
+from app.migrations import MIGRATIONS
+from app.server.async_server import AsyncWSGIServer, start_in_thread
+from benchmarks.datagen import BENCH_PASSWORD, member_email, populate
+from benchmarks.scenarios import SCENARIOS, Dataset, Scenario
+from config import Config
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '.data')
+
+class Transport:
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]], headers: Dict[str, str]) -> int:
+        raise NotImplementedError
+
+class ClientTransport(Transport):
+    def __init__(self, app: Flask) -> None:
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]], headers: Dict[str, str]) -> int:
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        return response.status_code
+
+class HttpTransport(Transport):
+    def __init__(self, base_url: str) -> None:
+        url = urllib.parse.urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]], headers: Dict[str, str]) -> int:
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers = {**headers, 'Content-Type': 'application/json'}
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            self.connection.connect()
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+        response.read()
+        return response.status
+
+@dataclass
+class ScenarioResult:
+    count: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)] * 1000
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "p50_ms": round(percentile(50), 3),
+            "p95_ms": round(percentile(95), 3),
+            "p99_ms": round(percentile(99), 3),
+            "rps": round(self.count / self.elapsed, 1) if self.elapsed else 0.0
+        }
+
+def prepare_database(books: int, members: int, seed: int) -> str:
+    os.makedirs(DATA_DIR, exist_ok=True)
+    template = os.path.join(DATA_DIR, f'template-{books}-{members}-{seed}-v{MIGRATIONS[-1].version}.db')
+    if not os.path.exists(template):
+        building = template + '.building'
+        if os.path.exists(building):
+            os.unlink(building)
+        app = create_app(replace(Config(), DATABASE_PATH=building))
+        app.extensions['db_pool'].close()
+        populate(building, books, members, seed)
+        os.replace(building, template)
+    working = os.path.join(DATA_DIR, f'run-{os.getpid()}.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(working + suffix):
+            os.unlink(working + suffix)
+    shutil.copyfile(template, working)
+    return working
+
+def bench_config(database_path: str, cache: bool) -> Config:
+    config = replace(Config(), DATABASE_PATH=database_path)
+    if not cache:
+        config = replace(config, RESPONSE_CACHE_SIZE=0)
+    return config
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+def start_server(app: Flask) -> Any:
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class AsyncServerHandle:
+    def __init__(self, app: Flask, workers: int) -> None:
+        self.server = AsyncWSGIServer(app, '127.0.0.1', 0, workers=workers)
+        start_in_thread(self.server)
+        self.server_port = self.server.port
+
+    def shutdown(self) -> None:
+        self.server.stop()
+
+def start_async_server(app: Flask) -> Any:
+    return AsyncServerHandle(app, app.config['DB_POOL_SIZE'])
+
+def open_idle_connections(url: str, count: int) -> List[socket.socket]:
+    parsed = urllib.parse.urlsplit(url)
+    sockets = []
+    for _ in range(count):
+        sockets.append(socket.create_connection((parsed.hostname, parsed.port or 80)))
+    return sockets
+
+def login(transport_factory: Any) -> str:
+    from app.utils.auth_utils import create_token
+    transport = transport_factory()
+    if isinstance(transport, ClientTransport):
+        response = transport.client.post(
+            '/auth/login',
+            json={"email": member_email(1), "password": BENCH_PASSWORD}
+        )
+        return response.get_json()['token']
+    body = json.dumps({"email": member_email(1), "password": BENCH_PASSWORD}).encode()
+    transport.connection.request('POST', '/auth/login', body=body, headers={'Content-Type': 'application/json'})
+    return json.loads(transport.connection.getresponse().read())['token']
+
+def run_scenario(
+    scenario: Scenario,
+    transport_factory: Any,
+    token: str,
+    dataset: Dataset,
+    requests: int,
+    concurrency: int,
+    seed: int
+) -> ScenarioResult:
+    result = ScenarioResult()
+    lock = threading.Lock()
+    per_worker = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+
+    def worker(index: int) -> None:
+        rng = random.Random(f"{seed}-{scenario.name}-{index}")
+        transport = transport_factory()
+        headers = {'Authorization': f'Bearer {token}'} if scenario.auth else {}
+        latencies = []
+        errors = 0
+        for _ in range(per_worker[index]):
+            method, path, body = scenario.make_request(rng, dataset)
+            start = time.perf_counter()
+            try:
+                status = transport.request(method, path, body, headers)
+            except Exception:
+                status = 599
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors += 1
+        with lock:
+            result.latencies.extend(latencies)
+            result.errors += errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    result.elapsed = time.perf_counter() - start
+    result.count = len(result.latencies)
+    return result
+
+def run(
+    books: int,
+    members: int,
+    seed: int,
+    mode: str,
+    requests: int,
+    concurrency: int,
+    scenarios: Optional[List[str]] = None,
+    cache: bool = False,
+    url: Optional[str] = None,
+    idle_connections: int = 0
+) -> Dict[str, Any]:
+    server = None
+    database_path = None
+    idle = []
+    if url is None:
+        database_path = prepare_database(books, members, seed)
+        app = create_app(bench_config(database_path, cache))
+        if mode == 'wsgi':
+            server = start_server(app)
+            url = f'http://127.0.0.1:{server.server_port}'
+        elif mode == 'async':
+            server = start_async_server(app)
+            url = f'http://127.0.0.1:{server.server_port}'
+    if url is not None:
+        transport_factory = lambda: HttpTransport(url)
+    else:
+        transport_factory = lambda: ClientTransport(app)
+    dataset = Dataset(books=books, members=members)
+    selected = [s for s in SCENARIOS if scenarios is None or s.name in scenarios]
+    results = {}
+    try:
+        if idle_connections and url is not None:
+            idle = open_idle_connections(url, idle_connections)
+        token = login(transport_factory)
+        for scenario in selected:
+            result = run_scenario(scenario, transport_factory, token, dataset, requests, concurrency, seed)
+            results[scenario.name] = result.summary()
+            print(format_row(scenario.name, results[scenario.name]), flush=True)
+    finally:
+        for sock in idle:
+            sock.close()
+        if server is not None:
+            server.shutdown()
+        if database_path is not None:
+            app.extensions['db_pool'].close()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(database_path + suffix):
+                    os.unlink(database_path + suffix)
+    return {
+        "meta": {
+            "books": books,
+            "members": members,
+            "seed": seed,
+            "mode": 'http' if url and server is None else mode,
+            "requests": requests,
+            "concurrency": concurrency,
+            "cache": cache,
+            "idle_connections": idle_connections,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "timestamp": int(time.time())
+        },
+        "scenarios": results
+    }
+
+def format_row(name: str, summary: Dict[str, Any]) -> str:
+    return (
+        f"{name:<24} {summary['rps']:>9.1f} req/s  p50 {summary['p50_ms']:>8.2f}ms  "
+        f"p95 {summary['p95_ms']:>8.2f}ms  p99 {summary['p99_ms']:>8.2f}ms  errors {summary['errors']}"
+    )
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    for name, now in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        if before['p95_ms'] and now['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if before['rps'] and now['rps'] < before['rps'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {before['rps']} -> {now['rps']} req/s")
+        if now['errors'] > before['errors']:
+            regressions.append(f"{name}: errors {before['errors']} -> {now['errors']}")
+    return regressions
@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.utils.query_utils import encode_cursor
+from benchmarks.datagen import ADJECTIVES, BENCH_PASSWORD, NOUNS, LAST_NAMES, member_email
+import itertools
+import random
+
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+
+@dataclass
+class Scenario:
+    name: str
+    make_request: Callable[[random.Random, 'Dataset'], Request]
+    auth: bool = True
+
+@dataclass
+class Dataset:
+    books: int
+    members: int
+
+_isbns = itertools.count(1)
+
+def _new_isbn() -> str:
+    return f"BENCH-{next(_isbns)}"
+
+def _book_body(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "title": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}",
+        "author": f"Bench {rng.choice(LAST_NAMES)}",
+        "isbn": _new_isbn(),
+        "quantity": rng.randint(0, 20)
+    }
+
+def _list_books_page(rng: random.Random, data: Dataset) -> Request:
+    pages = max(data.books // 20, 1)
+    return 'GET', f"/books?page={rng.randint(1, min(pages, 50))}&per_page=20", None
+
+def _list_books_deep_page(rng: random.Random, data: Dataset) -> Request:
+    pages = max(data.books // 20, 1)
+    return 'GET', f"/books?page={rng.randint(max(pages - 50, 1), pages)}&per_page=20", None
+
+def _list_books_cursor(rng: random.Random, data: Dataset) -> Request:
+    id = rng.randint(1, max(data.books, 1))
+    return 'GET', f"/books?limit=20&after={encode_cursor('id', id, id)}", None
+
+def _get_book(rng: random.Random, data: Dataset) -> Request:
+    return 'GET', f"/books/{rng.randint(1, max(data.books, 1))}", None
+
+def _search_books(rng: random.Random, data: Dataset) -> Request:
+    return 'GET', f"/books/search?q={rng.choice(NOUNS)}+{rng.choice(ADJECTIVES)}", None
+
+def _search_books_prefix(rng: random.Random, data: Dataset) -> Request:
+    return 'GET', f"/books/search?q=author:{rng.choice(LAST_NAMES)[:3]}*", None
+
+def _list_members(rng: random.Random, data: Dataset) -> Request:
+    id = rng.randint(1, max(data.members, 1))
+    return 'GET', f"/members?limit=20&after={encode_cursor('id', id, id)}", None
+
+def _get_member(rng: random.Random, data: Dataset) -> Request:
+    return 'GET', f"/members/{rng.randint(1, max(data.members, 1))}", None
+
+def _login(rng: random.Random, data: Dataset) -> Request:
+    email = member_email(rng.randint(1, max(data.members, 1)))
+    return 'POST', '/auth/login', {"email": email, "password": BENCH_PASSWORD}
+
+def _create_book(rng: random.Random, data: Dataset) -> Request:
+    return 'POST', '/books', _book_body(rng)
+
+def _update_book(rng: random.Random, data: Dataset) -> Request:
+    body = _book_body(rng)
+    return 'PUT', f"/books/{rng.randint(1, max(data.books, 1))}", body
+
+def _mixed(rng: random.Random, data: Dataset) -> Request:
+    roll = rng.random()
+    if roll < 0.1:
+        return _update_book(rng, data)
+    if roll < 0.15:
+        return _create_book(rng, data)
+    if roll < 0.5:
+        return _search_books(rng, data)
+    return _get_book(rng, data)
+
+SCENARIOS: List[Scenario] = [
+    Scenario('list_books_page', _list_books_page),
+    Scenario('list_books_deep_page', _list_books_deep_page),
+    Scenario('list_books_cursor', _list_books_cursor),
+    Scenario('get_book', _get_book),
+    Scenario('search_books', _search_books),
+    Scenario('search_books_prefix', _search_books_prefix),
+    Scenario('list_members', _list_members),
+    Scenario('get_member', _get_member),
+    Scenario('login', _login, auth=False),
+    Scenario('create_book', _create_book),
+    Scenario('update_book', _update_book),
+    Scenario('mixed_read_write', _mixed)
+]
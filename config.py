@@ -5,6 +5,26 @@ import os
 @dataclass
 class Config:
     SECRET_KEY: str = os.environ.get('SECRET_KEY', 'dev-key-please-change-in-production')
-    DATABASE_PATH: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'library.db')
+    DATABASE_PATH: str = os.environ.get(
+        'DATABASE_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'library.db')
+    )
     TOKEN_EXPIRATION: int = 3600  
-    PAGE_SIZE: int = 10
\ No newline at end of file
+    TOKEN_CACHE_SIZE: int = 10000
+    PAGE_SIZE: int = 10
+    MAX_PAGE_SIZE: int = 100
+    IMPORT_BATCH_SIZE: int = 5000
+    RESPONSE_CACHE_SIZE: int = 16 * 1024 * 1024
+    RESPONSE_CACHE_WATCH_DATA_VERSION: bool = True
+    DB_POOL_SIZE: int = 8
+    DB_POOL_TIMEOUT: float = 5.0
+    DB_BUSY_TIMEOUT: int = 5000
+    DB_MMAP_SIZE: int = 268435456
+    DB_CACHE_SIZE: int = -16000
+    DB_STATEMENT_CACHE: int = 256
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE: int = 32
+    PASSWORD_SCRYPT_N: int = 16384
+    BATCH_MAX_REQUESTS: int = 50
+    AUTO_MIGRATE: bool = True
\ No newline at end of file
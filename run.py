@@ -1,30 +1,144 @@
 from app import create_app, init_db
+from app.migrations import dry_run, schema_version
+from app.models.book import Book
+from app.utils.db_utils import get_db
+from app.utils.import_utils import import_books, open_import_file
+from app.utils.export_utils import EXPORT_FORMATS, export_books
+from app.server.async_server import serve
+from app.server.prefork import PreforkServer
+from config import Config
+from dataclasses import replace
+import argparse
+import os
 import sys
-from flask import jsonify
+from flask import Flask, jsonify
 
-app = create_app()
-
-@app.route('/', methods=['GET'])
 def root():
     return jsonify({
         "message": "Library Management System API",
         "status": "running",
         "endpoints": {
             "auth": ["/auth/register", "/auth/login"],
-            "books": ["/books", "/books/<id>", "/books/search"],
-            "members": ["/members", "/members/<id>"]
+            "books": ["/books", "/books/<id>", "/books/search", "/books/bulk", "/books/export"],
+            "members": ["/members", "/members/<id>"],
+            "batch": ["/batch"]
         }
     })
 
-@app.route('/test', methods=['GET'])
 def test():
     return jsonify({"message": "Test endpoint working"})
 
+def build_app(config: Config) -> Flask:
+    app = create_app(config)
+    app.add_url_rule('/', 'root', root, methods=['GET'])
+    app.add_url_rule('/test', 'test', test, methods=['GET'])
+    return app
+
+app = build_app(replace(Config(), AUTO_MIGRATE=sys.argv[1:2] != ['migrate']))
+
+def import_books_command(args: argparse.Namespace) -> None:
+    format = args.format
+    if format is None:
+        format = 'csv' if os.path.splitext(args.path)[1].lower() == '.csv' else 'ndjson'
+    stream, records = open_import_file(args.path, format)
+    with stream, app.app_context():
+        report = import_books(get_db(), records, batch_size=args.batch_size)
+    for error in report.to_dict()['errors']:
+        print(f"row {error['row']}: {error['error']}", file=sys.stderr)
+    if report.failed > len(report.errors):
+        print(f"... {report.failed - len(report.errors)} more errors", file=sys.stderr)
+    print(
+        f"Imported {report.inserted} books, {report.failed} failed "
+        f"in {report.elapsed:.2f}s ({report.rows_per_second:.0f} rows/s)"
+    )
+
+def export_books_command(args: argparse.Namespace) -> None:
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    with app.app_context():
+        columns = tuple(args.fields.split(',')) if args.fields else Book.FIELDS
+        for chunk in export_books(get_db(), args.format, compress=args.gzip, columns=columns):
+            output.write(chunk)
+    if args.output:
+        output.close()
+
+def migrate_command(args: argparse.Namespace) -> None:
+    with app.app_context():
+        if not args.dry_run:
+            for migration in init_db():
+                print(f"Applied {migration.version}: {migration.description}")
+            print(f"Schema is at version {schema_version(get_db())}")
+            return
+        conn = get_db()
+        print(f"Schema version {schema_version(conn)}")
+        pending, before, after = dry_run(conn)
+        if not pending:
+            print("No pending migrations")
+            return
+        for migration in pending:
+            print(f"Pending {migration.version}: {migration.description}")
+        for name, plan in before.items():
+            print(f"\n{name}")
+            print(f"  before: {'; '.join(plan)}")
+            print(f"  after:  {'; '.join(after[name])}")
+
+def serve_command(args: argparse.Namespace) -> None:
+    PreforkServer(
+        lambda: build_app(Config()),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        threads=args.threads,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        app=app
+    ).run()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Library Management System API")
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('init-db', help="Create the database schema")
+    migrator = commands.add_parser('migrate', help="Apply pending schema migrations")
+    migrator.add_argument('--dry-run', action='store_true', help="Show pending steps and their query-plan effect")
+    importer = commands.add_parser('import-books', help="Stream books from a CSV or NDJSON file")
+    importer.add_argument('path')
+    importer.add_argument('--format', choices=['csv', 'ndjson'])
+    importer.add_argument('--batch-size', type=int, default=app.config['IMPORT_BATCH_SIZE'])
+    exporter = commands.add_parser('export-books', help="Stream the catalog as CSV or NDJSON")
+    exporter.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson')
+    exporter.add_argument('--gzip', action='store_true')
+    exporter.add_argument('--output', '-o', help="Write to a file instead of stdout")
+    exporter.add_argument('--fields', help="Comma-separated columns to export")
+    prefork = commands.add_parser('serve', help="Serve the API from pre-forked worker processes")
+    prefork.add_argument('--host', default='0.0.0.0')
+    prefork.add_argument('--port', type=int, default=5001)
+    prefork.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    prefork.add_argument('--threads', type=int, default=app.config['DB_POOL_SIZE'], help="Request threads per worker")
+    prefork.add_argument('--max-requests', type=int, default=0, help="Recycle a worker after this many requests (0 disables)")
+    prefork.add_argument('--max-requests-jitter', type=int, default=0)
+    prefork.add_argument('--graceful-timeout', type=float, default=30.0)
+    server = commands.add_parser('serve-async', help="Serve the API from an asyncio event loop")
+    server.add_argument('--host', default='0.0.0.0')
+    server.add_argument('--port', type=int, default=5001)
+    server.add_argument('--workers', type=int, default=app.config['DB_POOL_SIZE'], help="Threads running request handlers")
+    return parser
+
 if __name__ == '__main__':
-    if len(sys.argv) > 1 and sys.argv[1] == 'init-db':
+    args = build_parser().parse_args()
+    if args.command == 'init-db':
         with app.app_context():
             init_db()
             print("Database initialized successfully!")
+    elif args.command == 'migrate':
+        migrate_command(args)
+    elif args.command == 'import-books':
+        import_books_command(args)
+    elif args.command == 'export-books':
+        export_books_command(args)
+    elif args.command == 'serve':
+        serve_command(args)
+    elif args.command == 'serve-async':
+        serve(app, args.host, args.port, args.workers)
     else:
         # Added host='0.0.0.0' to ensure the server is accessible
-        app.run(host='0.0.0.0', debug=True, port=5001)
\ No newline at end of file
+        app.run(host='0.0.0.0', debug=True, port=5001)
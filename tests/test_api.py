@@ -1,17 +1,22 @@
 import pytest
 import os
 import tempfile
+import base64
 import sqlite3
+from dataclasses import dataclass
 from app import create_app, init_db
 from config import Config
 
 @pytest.fixture
 def app():
     db_fd, db_path = tempfile.mkstemp()
+    @dataclass
     class TestConfig(Config):
-        DATABASE_PATH = db_path
-        TESTING = True
-        SECRET_KEY = 'test-key'
+        DATABASE_PATH: str = db_path
+        TESTING: bool = True
+        SECRET_KEY: str = 'test-key'
+        PASSWORD_HASH_WORKERS: int = 0
+        PASSWORD_SCRYPT_N: int = 1024
     
     app = create_app(TestConfig())
     
@@ -20,6 +25,7 @@ def app():
     
     yield app
     
+    app.extensions['db_pool'].close()
     os.close(db_fd)
     os.unlink(db_path)
 
@@ -164,3 +170,436 @@ def test_pagination(client, auth_token):
     assert data['total'] == 3
     assert data['total_pages'] == 2
 
+
+def test_connection_pool_reuses_connections(app, client, auth_token):
+    for page in range(1, 6):
+        response = client.get(
+            f'/books?page={page}',
+            headers={'Authorization': f'Bearer {auth_token}'}
+        )
+        assert response.status_code == 200
+    stats = app.extensions['db_pool'].stats()
+    assert stats['open'] <= stats['size']
+    assert stats['hits'] >= 5
+
+def test_connection_pool_configures_connections(app):
+    with app.extensions['db_pool'].connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == app.config['DB_BUSY_TIMEOUT']
+
+def test_cursor_pagination(client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    for i in range(5):
+        client.post(
+            '/books',
+            json={
+                'title': f'Book {4 - i}',
+                'author': f'Author {i}',
+                'isbn': f'ISBN{i}',
+                'quantity': 1
+            },
+            headers=headers
+        )
+    titles = []
+    url = '/books?limit=2&sort=title&count=true'
+    while True:
+        data = client.get(url, headers=headers).get_json()
+        assert data['total'] == 5
+        titles.extend(book['title'] for book in data['books'])
+        if data['next_cursor'] is None:
+            break
+        url = f"/books?limit=2&sort=title&count=true&after={data['next_cursor']}"
+    assert titles == [f'Book {i}' for i in range(5)]
+
+def test_cursor_pagination_rejects_bad_input(client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    assert client.get('/books?after=not-a-cursor', headers=headers).status_code == 400
+    assert client.get('/members?limit=2&sort=email', headers=headers).status_code == 400
+    response = client.get('/members?per_page=1000', headers=headers)
+    assert response.get_json()['per_page'] == 100
+    assert response.get_json()['total'] == 1
+
+def test_search_books_ranked_prefix_and_fields(client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    for i, (title, author) in enumerate([
+        ('Python Programming', 'Guido Rossum'),
+        ('Learning Python', 'Mark Lutz'),
+        ('Monty Python Scripts', 'Eric Idle'),
+        ('Snakes of the World', 'Python Expert')
+    ]):
+        client.post(
+            '/books',
+            json={'title': title, 'author': author, 'isbn': f'FTS{i}', 'quantity': 1},
+            headers=headers
+        )
+    data = client.get('/books/search?q=pyth*&per_page=2', headers=headers).get_json()
+    assert len(data['books']) == 2
+    assert data['has_more'] is True
+    data = client.get('/books/search?q=author:python', headers=headers).get_json()
+    assert [book['title'] for book in data['books']] == ['Snakes of the World']
+    client.put(
+        f"/books/{data['books'][0]['id']}",
+        json={'title': 'Snakes', 'author': 'Someone Else', 'isbn': 'FTS3', 'quantity': 1},
+        headers=headers
+    )
+    data = client.get('/books/search?q=author:python', headers=headers).get_json()
+    assert data['books'] == []
+    response = client.get('/books/search?q=isbn:FTS1', headers=headers)
+    assert response.status_code == 400
+
+def test_search_index_backfills_existing_rows(tmp_path):
+    db_path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            isbn TEXT UNIQUE NOT NULL,
+            quantity INTEGER NOT NULL
+        )
+    ''')
+    conn.execute(
+        "INSERT INTO books (title, author, isbn, quantity) VALUES ('Dune', 'Frank Herbert', 'D1', 2)"
+    )
+    conn.commit()
+    conn.close()
+
+    @dataclass
+    class LegacyConfig(Config):
+        DATABASE_PATH: str = db_path
+        SECRET_KEY: str = 'test-key'
+
+    legacy_app = create_app(LegacyConfig())
+    legacy_client = legacy_app.test_client()
+    token = legacy_client.post('/auth/register', json={
+        'name': 'Test User',
+        'email': 'test@example.com',
+        'password': 'password123'
+    }).get_json()['token']
+    response = legacy_client.get(
+        '/books/search?q=herbert',
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert [book['title'] for book in response.get_json()['books']] == ['Dune']
+    legacy_app.extensions['db_pool'].close()
+
+def test_bulk_create_books(client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    response = client.post(
+        '/books/bulk',
+        json=[
+            {'title': 'Bulk 1', 'author': 'A', 'isbn': 'B1', 'quantity': 1},
+            {'title': 'Bulk 2', 'author': 'A', 'isbn': 'B1', 'quantity': 1},
+            {'title': '', 'author': 'A', 'isbn': 'B3', 'quantity': 1},
+            {'title': 'Bulk 4', 'author': 'A', 'isbn': 'B4'}
+        ],
+        headers=headers
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['inserted'] == 1
+    assert [error['row'] for error in data['errors']] == [2, 3, 4]
+    assert data['errors'][0]['error'] == 'ISBN already exists'
+
+    body = '\n'.join([
+        '{"title": "Bulk 5", "author": "B", "isbn": "B5", "quantity": 2}',
+        'not json',
+        '{"title": "Bulk 6", "author": "B", "isbn": "B1", "quantity": 2}',
+        '{"title": "Bulk 7", "author": "B", "isbn": "B7", "quantity": 2}'
+    ])
+    response = client.post(
+        '/books/bulk',
+        data=body,
+        content_type='application/x-ndjson',
+        headers=headers
+    )
+    data = response.get_json()
+    assert data['inserted'] == 2
+    assert data['failed'] == 2
+    total = client.get('/books', headers=headers).get_json()['total']
+    assert total == 3
+
+def test_import_books_batches_detect_duplicates(app):
+    from app.utils.import_utils import import_books
+    records = [
+        {'title': f'Book {i}', 'author': 'A', 'isbn': f'I{i % 7}', 'quantity': 1}
+        for i in range(20)
+    ]
+    with app.extensions['db_pool'].connection() as conn:
+        report = import_books(conn, records, batch_size=3, max_errors=5)
+    assert report.inserted == 7
+    assert report.failed == 13
+    assert len(report.errors) == 5
+
+def test_export_books_streams_ndjson_and_gzip_csv(client, auth_token):
+    import gzip
+    import json
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    client.post(
+        '/books/bulk',
+        json=[
+            {'title': f'Export {i}', 'author': 'A, B', 'isbn': f'E{i}', 'quantity': i}
+            for i in range(25)
+        ],
+        headers=headers
+    )
+    response = client.get('/books/export', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data().decode().splitlines()
+    assert len(lines) == 25
+    assert json.loads(lines[3])['isbn'] == 'E3'
+
+    response = client.get('/books/export?format=csv&gzip=true', headers=headers)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    rows = gzip.decompress(response.get_data()).decode().splitlines()
+    assert rows[0] == 'id,title,author,isbn,quantity'
+    assert rows[1].endswith(',Export 0,"A, B",E0,0')
+    assert len(rows) == 26
+    assert client.get('/books/export?format=xml', headers=headers).status_code == 400
+
+def test_token_cache_hits_and_logout_revokes(app, client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    for _ in range(3):
+        assert client.get('/books', headers=headers).status_code == 200
+    stats = app.extensions['token_authority'].cache.stats()
+    assert stats['hits'] >= 2
+    assert client.post('/auth/logout', headers=headers).status_code == 200
+    response = client.get('/books', headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Token has been revoked'
+
+def test_deleted_member_token_is_revoked(client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    member_id = client.get('/members', headers=headers).get_json()['members'][0]['id']
+    assert client.get(f'/members/{member_id}', headers=headers).status_code == 200
+    assert client.delete(f'/members/{member_id}', headers=headers).status_code == 200
+    assert client.get('/books', headers=headers).status_code == 401
+
+def test_cached_token_expiry_and_tampering(app, client, auth_token, monkeypatch):
+    import time as time_module
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    assert client.get('/books', headers=headers).status_code == 200
+    payload_b64, signature = auth_token.split('.')
+    forged = base64.b64encode(b'{"user_id": 999, "exp": 9999999999}').decode()
+    response = client.get('/books', headers={'Authorization': f'Bearer {forged}.{signature}'})
+    assert response.status_code == 401
+    future = time_module.time() + app.config['TOKEN_EXPIRATION'] + 1
+    monkeypatch.setattr(time_module, 'time', lambda: future)
+    response = client.get('/books', headers=headers)
+    assert response.get_json()['error'] == 'Token has expired'
+
+def test_response_cache_etag_and_invalidation(app, client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    book_id = client.post(
+        '/books',
+        json={'title': 'Cached', 'author': 'A', 'isbn': 'C1', 'quantity': 1},
+        headers=headers
+    ).get_json()['id']
+    first = client.get(f'/books/{book_id}', headers=headers)
+    etag = first.headers['ETag']
+    assert etag.startswith('"')
+    second = client.get(f'/books/{book_id}', headers={**headers, 'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.get_data() == b''
+    stats = app.extensions['response_cache'].stats()
+    assert stats['hits'] >= 1
+    assert stats['not_modified'] == 1
+
+    client.put(
+        f'/books/{book_id}',
+        json={'title': 'Changed', 'author': 'A', 'isbn': 'C1', 'quantity': 1},
+        headers=headers
+    )
+    third = client.get(f'/books/{book_id}', headers={**headers, 'If-None-Match': etag})
+    assert third.status_code == 200
+    assert third.get_json()['title'] == 'Changed'
+
+def test_response_cache_sees_writes_from_other_connections(app, client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    assert client.get('/books', headers=headers).get_json()['total'] == 0
+    conn = sqlite3.connect(app.config['DATABASE_PATH'])
+    conn.execute(
+        "INSERT INTO books (title, author, isbn, quantity) VALUES ('Outside', 'A', 'O1', 1)"
+    )
+    conn.commit()
+    conn.close()
+    assert client.get('/books', headers=headers).get_json()['total'] == 1
+
+def test_sparse_fieldsets(client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    for i in range(3):
+        client.post(
+            '/books',
+            json={'title': f'Field Book {i}', 'author': 'A', 'isbn': f'F{i}', 'quantity': 1},
+            headers=headers
+        )
+    data = client.get('/books?fields=id,title', headers=headers).get_json()
+    assert data['books'][0] == {'id': data['books'][0]['id'], 'title': 'Field Book 0'}
+    data = client.get('/books?limit=2&sort=author&fields=title', headers=headers).get_json()
+    assert data['books'] == [{'title': 'Field Book 0'}, {'title': 'Field Book 1'}]
+    after = data['next_cursor']
+    data = client.get(f'/books?limit=2&sort=author&fields=title&after={after}', headers=headers).get_json()
+    assert data['books'] == [{'title': 'Field Book 2'}]
+    book_id = client.get('/books?fields=id', headers=headers).get_json()['books'][0]['id']
+    assert client.get(f'/books/{book_id}?fields=isbn', headers=headers).get_json() == {'isbn': 'F0'}
+    data = client.get('/books/search?q=field&fields=isbn&per_page=1', headers=headers).get_json()
+    assert list(data['books'][0]) == ['isbn']
+    response = client.get('/books/export?fields=isbn', headers=headers)
+    assert response.get_data().decode().splitlines()[0] == '{"isbn":"F0"}'
+    data = client.get('/members?fields=email', headers=headers).get_json()
+    assert data['members'] == [{'email': 'test@example.com'}]
+    assert client.get('/books?fields=password', headers=headers).status_code == 400
+    assert client.get('/members?fields=password', headers=headers).status_code == 400
+    assert client.get('/books/export?fields=id;drop', headers=headers).status_code == 400
+
+def test_metrics_endpoint_reports_requests_and_sql(app, client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    client.get('/books?per_page=5', headers=headers)
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert '# TYPE library_request_duration_seconds histogram' in text
+    assert 'library_request_duration_seconds_count{endpoint="books.list_books",method="GET",status="200"} 1' in text
+    assert 'library_request_phase_seconds_count{phase="auth"}' in text
+    assert 'statement="SELECT id, title, author, isbn, quantity FROM books LIMIT ? OFFSET ?"' in text
+    assert 'library_db_pool_hits_total' in text
+    assert 'library_token_cache_hit_ratio' in text
+
+def test_slow_query_log_captures_query_plan(app, client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    app.extensions['metrics'].slow_query_threshold = 1e-9
+    client.get('/books/search?q=python', headers=headers)
+    slow = list(app.extensions['metrics'].slow_queries)
+    search = [entry for entry in slow if 'books_fts MATCH' in entry['sql']]
+    assert search and search[0]['plan']
+    assert 'library_slow_queries_total' in client.get('/metrics').get_data(as_text=True)
+
+def test_async_server_keeps_connections_alive_and_streams(app, auth_token):
+    import http.client
+    import json
+    from app.server.async_server import AsyncWSGIServer, start_in_thread
+    server = AsyncWSGIServer(app, '127.0.0.1', 0, workers=2)
+    start_in_thread(server)
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=10)
+        headers = {'Authorization': f'Bearer {auth_token}', 'Content-Type': 'application/json'}
+        for i in range(3):
+            body = json.dumps({'title': f'Async {i}', 'author': 'A', 'isbn': f'AS{i}', 'quantity': 1})
+            conn.request('POST', '/books', body=body, headers=headers)
+            response = conn.getresponse()
+            assert response.status == 201
+            response.read()
+        conn.request('GET', '/books/export', headers=headers)
+        response = conn.getresponse()
+        assert response.getheader('Transfer-Encoding') == 'chunked'
+        assert len(response.read().splitlines()) == 3
+        conn.request('GET', '/books?per_page=2', headers=headers)
+        assert len(json.loads(conn.getresponse().read())['books']) == 2
+        assert server.requests == 5
+        assert server.open_connections == 1
+    finally:
+        server.stop()
+
+def test_legacy_password_is_rehashed_on_login(app, client):
+    import hashlib
+    legacy = hashlib.sha256(b'password123').hexdigest()
+    with app.app_context():
+        from app.utils.db_utils import get_db
+        conn = get_db()
+        conn.execute(
+            'INSERT INTO members (name, email, password) VALUES (?, ?, ?)',
+            ('Legacy', 'legacy@example.com', legacy)
+        )
+        conn.commit()
+    login = {'email': 'legacy@example.com', 'password': 'password123'}
+    assert client.post('/auth/login', json={**login, 'password': 'wrong-pass'}).status_code == 401
+    assert client.post('/auth/login', json=login).status_code == 200
+    with app.app_context():
+        stored = get_db().execute('SELECT password FROM members WHERE email = ?', (login['email'],)).fetchone()[0]
+    assert stored.startswith('scrypt$1024$')
+    assert app.extensions['password_hasher'].stats()['rehashed'] == 1
+    assert client.post('/auth/login', json=login).status_code == 200
+
+def test_password_hasher_process_pool_and_overload(app, client):
+    from app.utils.password_utils import PasswordHasher, verify_password
+    hasher = PasswordHasher(workers=1, max_pending=0, n=1024)
+    try:
+        stored = hasher.hash('password123')
+        assert hasher.verify('password123', stored)
+        assert not verify_password('password124', stored)
+    finally:
+        hasher.shutdown()
+    busy = app.extensions['password_hasher']
+    for _ in range(busy.workers + busy.max_pending):
+        busy._slots.acquire()
+    response = client.post('/auth/register', json={
+        'name': 'Busy', 'email': 'busy@example.com', 'password': 'password123'
+    })
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert busy.stats()['rejected'] == 1
+
+def test_multi_get_books_and_members_by_ids(client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    ids = [
+        client.post('/books', json={'title': f'Multi {i}', 'author': 'A', 'isbn': f'MG{i}', 'quantity': 1},
+                    headers=headers).get_json()['id']
+        for i in range(3)
+    ]
+    response = client.get(f'/books?ids={ids[2]},999,{ids[0]}&fields=title', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == {'books': [{'title': 'Multi 2'}, {'title': 'Multi 0'}], 'missing': [999]}
+    assert client.get('/books?ids=1,x', headers=headers).status_code == 400
+    members = client.get('/members?ids=1', headers=headers).get_json()
+    assert [m['email'] for m in members['members']] == ['test@example.com']
+
+def test_batch_runs_items_in_one_transaction_with_per_item_status(app, client, auth_token):
+    headers = {'Authorization': f'Bearer {auth_token}'}
+    book = {'title': 'Batch', 'author': 'A', 'isbn': 'B1', 'quantity': 1}
+    response = client.post('/batch', json={'requests': [
+        {'method': 'POST', 'path': '/books', 'body': book},
+        {'method': 'POST', 'path': '/books', 'body': book},
+        {'method': 'GET', 'path': '/books?ids=1'},
+        {'method': 'GET', 'path': '/nowhere'},
+        {'method': 'POST', 'path': '/books/bulk', 'body': [book]}
+    ]}, headers=headers)
+    assert response.status_code == 200
+    statuses = [item['status'] for item in response.get_json()['responses']]
+    assert statuses == [201, 400, 200, 404, 400]
+    assert response.get_json()['responses'][2]['body']['books'][0]['isbn'] == 'B1'
+    assert client.get('/books?count=1', headers=headers).get_json()['total'] == 1
+    assert client.post('/batch', json={'requests': []}, headers=headers).status_code == 400
+    too_many = [{'path': '/books'}] * (app.config['BATCH_MAX_REQUESTS'] + 1)
+    assert client.post('/batch', json={'requests': too_many}, headers=headers).status_code == 400
+    assert client.post('/batch', json={'requests': [{'path': '/books'}]}).status_code == 401
+
+def test_migrations_upgrade_legacy_schema_and_skip_when_current(app):
+    from app.migrations import MIGRATIONS, dry_run, migrate, schema_version
+    with app.app_context():
+        from app.utils.db_utils import get_db
+        conn = get_db()
+        assert schema_version(conn) == MIGRATIONS[-1].version
+        assert migrate(conn) == []
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {'idx_books_title', 'idx_books_author', 'idx_members_name'} <= indexes
+
+    legacy = sqlite3.connect(':memory:')
+    legacy.execute('CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, '
+                   'author TEXT NOT NULL, isbn TEXT UNIQUE NOT NULL, quantity INTEGER NOT NULL)')
+    legacy.executemany(
+        'INSERT INTO books (title, author, isbn, quantity) VALUES (?, ?, ?, 1)',
+        [('Dune' if i == 0 else f'Book {i}', f'Author {i % 40}', f'X{i}') for i in range(500)]
+    )
+    legacy.commit()
+    pending, before, after = dry_run(legacy)
+    assert [m.version for m in pending] == [m.version for m in MIGRATIONS]
+    assert 'idx_books_author' not in ' '.join(before['books by author'])
+    assert 'idx_books_author' in ' '.join(after['books by author'])
+    assert schema_version(legacy) == 0
+    assert len(migrate(legacy)) == len(MIGRATIONS)
+    assert legacy.execute("SELECT row_count FROM row_counts WHERE table_name = 'books'").fetchone()[0] == 500
+    assert legacy.execute("SELECT rowid FROM books_fts WHERE books_fts MATCH 'dune'").fetchone()[0] == 1